@@ -42,9 +42,9 @@ INSTALLED_APPS = [
 ]
 
 CORS_ALLOWED_ORIGINS = [
-    "https://SEU_USUARIO.github.io",
-    "https://SEU_USUARIO.github.io/SEU_REPO",  # project pages
+    "https://SEU_USUARIO.github.io",  # vale também para project pages (.../SEU_REPO): origem não tem path
 ]
+CORS_EXPOSE_HEADERS = ["ETag", "Last-Modified", "Link", "X-Next-Cursor"]
 
 
 # (Opcional) CORS: se quiser usar um front em http://localhost:5173
@@ -58,11 +58,13 @@ CORS_ALLOWED_ORIGINS = [
 
 # --- Middleware ---
 MIDDLEWARE = [
+    "game.metrics.MetricsMiddleware",  # primeiro: mede a requisição inteira
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "game.profiling.ProfileMiddleware",  # depois do auth: gatilho por usuário staff
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -109,6 +111,59 @@ else:
             "PORT": os.getenv("PGPORT", "5432"),
         }
     }
+# --- Cache ---
+# Padrão: memória local do processo. Para compartilhar entre workers, ex.:
+#   CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#   CACHE_LOCATION=/tmp/hearts-n-swords-cache
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "hearts-n-swords"),
+    }
+}
+RANKING_CACHE_TTL = int(os.getenv("RANKING_CACHE_TTL", "60"))  # segundos
+
+# --- Concorrência das jogadas ---
+# "lock": select_for_update na run (padrão). "optimistic": lê sem lock e grava
+# com UPDATE ... WHERE version=?; em conflito repete até RUN_CAS_RETRIES vezes.
+RUN_CONCURRENCY = os.getenv("RUN_CONCURRENCY", "lock")
+RUN_CAS_RETRIES = int(os.getenv("RUN_CAS_RETRIES", "2"))
+
+# --- Cache write-behind das runs ativas (game/hotruns.py) ---
+# Desligado por padrão. Ligado, as jogadas ficam em memória e vão ao banco em
+# checkpoints (fim de turno, fim da run, despejo ou RUN_HOT_FLUSH_SECONDS).
+# RUN_HOT_SHARED guarda a cauda não gravada no cache do Django para recuperar
+# após um crash (use um backend persistente/compartilhado, ex. Redis).
+RUN_HOT_CACHE = os.getenv("RUN_HOT_CACHE", "0") == "1"
+RUN_HOT_CACHE_SIZE = int(os.getenv("RUN_HOT_CACHE_SIZE", "1000"))    # runs por processo
+RUN_HOT_CACHE_TTL = int(os.getenv("RUN_HOT_CACHE_TTL", "300"))       # segundos sem jogada
+RUN_HOT_FLUSH_SECONDS = int(os.getenv("RUN_HOT_FLUSH_SECONDS", "30"))
+RUN_HOT_SHARED = os.getenv("RUN_HOT_SHARED", "0") == "1"
+
+# --- Views async (game/views_async.py) ---
+# Troca as views de jogada/ranking da API pelas versões async. Use só sob ASGI
+# (uvicorn backend.asgi:application); sob WSGI cada requisição ganharia um loop.
+ASYNC_API = os.getenv("ASYNC_API", "0") == "1"
+
+# --- Métricas (game/metrics.py, GET /api/metrics) ---
+# Se definido, /api/metrics exige "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# --- Conferência de score (game/verify.py) ---
+# SubmitScoreView reaplica o log da run antes de aceitar o envio; audit_scores confere o ranking todo.
+SCORE_VERIFY = os.getenv("SCORE_VERIFY", "1") == "1"
+
+# --- Exportação (game/export.py, GET /api/export/<runs|scores>) ---
+# Staff logado ou "Authorization: Bearer <EXPORT_TOKEN>" (vazio = só staff).
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN", "")
+
+# --- Perfil sob demanda (game/profiling.py; resumo: manage.py profiles) ---
+# Gatilhos: header X-Profile / ?_profile= com PROFILE_TOKEN (ou "1" para staff)
+# e amostragem PROFILE_SAMPLE_RATE (0..1).
+PROFILE_DIR = os.getenv("PROFILE_DIR", str(BASE_DIR / "profiles"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
 # --- Validação de senha (padrão Django) ---
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
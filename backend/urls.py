@@ -1,13 +1,52 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
+from game import views_async
+from game.export import export_view
+from game.metrics import metrics_view
 from game.views_pages import HomeView, GamePageView, ContactView, RankingView
 from game.views import (
-    StartRunView, RunDetailView,
+    StartRunView, DailyView, RunDetailView, RunEventsView, RunMovesView,
     EquipFromSlotView, DiscardFromSlotView, UseHealFromSlotView,
-    FightFromSlotView, PayLifeDiscardView, EndTurnView,
+    FightFromSlotView, PayLifeDiscardView, EndTurnView, BatchActionsView,
     SubmitScoreView, RankingApiView
 )
 
+API_SYNC = [
+    path("api/start", StartRunView.as_view()),
+    path("api/daily", DailyView.as_view()),
+    path("api/run/<uuid:pk>", RunDetailView.as_view()),
+    path("api/run/<uuid:pk>/equip/<int:idx>", EquipFromSlotView.as_view()),
+    path("api/run/<uuid:pk>/discard/<int:idx>", DiscardFromSlotView.as_view()),
+    path("api/run/<uuid:pk>/use_heal/<int:idx>", UseHealFromSlotView.as_view()),
+    path("api/run/<uuid:pk>/fight/<int:idx>", FightFromSlotView.as_view()),
+    path("api/run/<uuid:pk>/pay_life/<int:idx>", PayLifeDiscardView.as_view()),
+    path("api/run/<uuid:pk>/end_turn", EndTurnView.as_view()),
+    path("api/run/<uuid:pk>/actions", BatchActionsView.as_view()),
+    path("api/run/<uuid:pk>/events", RunEventsView.as_view()),
+    path("api/run/<uuid:pk>/moves", RunMovesView.as_view()),
+    path("api/run/<uuid:pk>/score", SubmitScoreView.as_view()),
+    path("api/ranking", RankingApiView.as_view()),
+]
+
+# mesmos caminhos, views async (settings.ASYNC_API; só faz sentido sob ASGI)
+API_ASYNC = [
+    path("api/start", views_async.start_run_view),
+    path("api/daily", DailyView.as_view()),
+    path("api/run/<uuid:pk>", views_async.run_detail_view),
+    path("api/run/<uuid:pk>/equip/<int:idx>", views_async.run_action_view, {"kind": "equip"}),
+    path("api/run/<uuid:pk>/discard/<int:idx>", views_async.run_action_view, {"kind": "discard"}),
+    path("api/run/<uuid:pk>/use_heal/<int:idx>", views_async.run_action_view, {"kind": "use_heal"}),
+    path("api/run/<uuid:pk>/fight/<int:idx>", views_async.run_action_view, {"kind": "fight"}),
+    path("api/run/<uuid:pk>/pay_life/<int:idx>", views_async.run_action_view, {"kind": "pay_life"}),
+    path("api/run/<uuid:pk>/end_turn", views_async.run_action_view, {"kind": "end_turn"}),
+    path("api/run/<uuid:pk>/actions", views_async.batch_actions_view),
+    path("api/run/<uuid:pk>/events", RunEventsView.as_view()),
+    path("api/run/<uuid:pk>/moves", RunMovesView.as_view()),
+    path("api/run/<uuid:pk>/score", SubmitScoreView.as_view()),
+    path("api/ranking", views_async.ranking_api_view),
+]
+
 urlpatterns = [
     # páginas
     path("", HomeView.as_view(), name="home"),
@@ -19,15 +58,8 @@ urlpatterns = [
     path("admin/", admin.site.urls),
 
     # API nova
-    path("api/start", StartRunView.as_view()),
-    path("api/run/<uuid:pk>", RunDetailView.as_view()),
-    path("api/run/<uuid:pk>/equip/<int:idx>", EquipFromSlotView.as_view()),
-    path("api/run/<uuid:pk>/discard/<int:idx>", DiscardFromSlotView.as_view()),
-    path("api/run/<uuid:pk>/use_heal/<int:idx>", UseHealFromSlotView.as_view()),
-    path("api/run/<uuid:pk>/fight/<int:idx>", FightFromSlotView.as_view()),
-    path("api/run/<uuid:pk>/pay_life/<int:idx>", PayLifeDiscardView.as_view()),
-    path("api/run/<uuid:pk>/end_turn", EndTurnView.as_view()),
-    path("api/run/<uuid:pk>/score", SubmitScoreView.as_view()),
-    path("api/ranking", RankingApiView.as_view()),
+    *(API_ASYNC if settings.ASYNC_API else API_SYNC),
+    path("api/metrics", metrics_view),
+    path("api/export/<str:kind>", export_view),
 
 ]
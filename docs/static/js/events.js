@@ -1,6 +1,25 @@
 import { API } from './api.js';
-import { state, setRun } from './state.js';
+import { state, setRun, mergeRun } from './state.js';
 import { render, log } from './ui.js';
+import { openLive } from './live.js';
+
+let live = null;
+
+// abre o canal ao vivo da run; frames de outras abas atualizam a tela
+function connect(run){
+  if(live) live.close();
+  live = openLive(run.id, (frame)=>{
+    if(frame.type === 'error' || !state.run) return;
+    const run = mergeRun(frame);
+    setRun(run); render(run);
+    for(const text of frame.events || []) log(text);
+  });
+}
+
+// ação pelo WebSocket se estiver aberto; senão pela API HTTP
+function play(action, idx, viaHttp){
+  return live?.ready ? live.send(action, idx) : viaHttp();
+}
 
 export function attachEvents(){
   // start form
@@ -10,12 +29,30 @@ export function attachEvents(){
     const max_hp = parseInt(document.getElementById('maxhp').value || '20',10);
     const run = await API.start(seed, max_hp);
     setRun(run); render(run); log(`Run iniciada (seed=${seed})`);
+    state.lastEvent = null;
+    connect(run);
+  });
+
+  document.getElementById('dailyBtn').addEventListener('click', async ()=>{
+    const max_hp = parseInt(document.getElementById('maxhp').value || '20',10);
+    const run = await API.startDaily(max_hp);
+    setRun(run); render(run); log(`Desafio do dia iniciado (seed=${run.seed})`);
+    state.lastEvent = null;
+    connect(run);
   });
 
   document.getElementById('refreshBtn').addEventListener('click', async ()=>{
     if(!state.id) return;
-    const run = await API.getRun(state.id);
-    setRun(run); render(run);
+    const run = await API.getRun(state.id);  // estado completo
+    setRun(run); render(run); connect(run);
+    // só o log novo desde o último refresh (o primeiro só marca o cursor)
+    let after = state.lastEvent ?? 0, page;
+    do {
+      page = await API.events(state.id, after);
+      if(state.lastEvent != null) for(const e of page.events) log(e.text);
+      after = page.next;
+    } while(page.events.length);
+    state.lastEvent = after;
   });
 
   // board delegation
@@ -24,26 +61,37 @@ export function attachEvents(){
     if(!btn || !state.id) return;
     const action = btn.dataset.action;
     const idx = parseInt(btn.dataset.idx,10);
+    const v = state.run?.version;
     try{
       let run;
-      if(action==='equip') run = await API.equip(state.id, idx);
-      else if(action==='discard') run = await API.discard(state.id, idx);
-      else if(action==='use_heal') run = await API.useHeal(state.id, idx);
-      else if(action==='fight') run = await API.fight(state.id, idx);
+      if(action==='equip') run = await play(action, idx, ()=>API.equip(state.id, idx, v));
+      else if(action==='discard') run = await play(action, idx, ()=>API.discard(state.id, idx, v));
+      else if(action==='use_heal') run = await play(action, idx, ()=>API.useHeal(state.id, idx, v));
+      else if(action==='fight') run = await play(action, idx, ()=>API.fight(state.id, idx, v));
       else if(action==='pay_life'){
         if(!confirm('Confirmar: pagar vida para descartar este inimigo?')) return;
-        run = await API.payLife(state.id, idx);
+        run = await play(action, idx, ()=>API.payLife(state.id, idx, v));
       }
-      if(run){ setRun(run); render(run); log(`${action} no slot ${idx+1}`); }
+      if(run){ run = mergeRun(run); setRun(run); render(run); log(`${action} no slot ${idx+1}`); }
     }catch(err){ alert(err.message); }
   });
 
   // end turn
   document.getElementById('endTurn').addEventListener('click', async ()=>{
     try{
-      const run = await API.endTurn(state.id);
+      const run = mergeRun(await play('end_turn', null, ()=>API.endTurn(state.id, state.run?.version)));
       setRun(run); render(run); log(`Fim do turno. Novo turno: ${run.turn}`);
     }catch(err){ alert(err.message); }
+  });
+  // dica: melhor jogada do turno pela mesa visível
+  document.getElementById('hintBtn').addEventListener('click', async ()=>{
+    if(!state.id) return;
+    try{
+      const { hint } = await API.moves(state.id, 5);
+      if(!hint) return log('Sem jogadas: a run acabou.');
+      const slot = hint.idx == null ? '' : ` no slot ${hint.idx+1}`;
+      log(`Dica: ${hint.action}${slot} (${hint.line.map(m=>m.action).join(' → ')})`);
+    }catch(err){ alert(err.message); }
   });
     // enviar score
   document.getElementById('sendScore').addEventListener('click', async ()=>{
@@ -0,0 +1,43 @@
+// static/js/live.js
+// Canal ao vivo da run (WebSocket em /ws/run/<id>): uma conexão por run,
+// ações viram frames e o servidor responde com deltas + eventos.
+// Sem WebSocket (ou servidor só WSGI) o jogo segue pelo fetch de api.js.
+
+function wsUrl(id){
+  const base = (window.API_BASE || window.location.origin).replace(/\/$/, "");
+  return `${base.replace(/^http/, "ws")}/ws/run/${id}`;
+}
+
+// onPush(frame) recebe o estado inicial e as jogadas feitas por outras abas
+export function openLive(id, onPush){
+  if(!("WebSocket" in window)) return null;
+  const ws = new WebSocket(wsUrl(id));
+  const pending = new Map();
+  let seq = 0;
+  const live = { ready: false };
+
+  ws.onopen = () => { live.ready = true; };
+  ws.onclose = () => {
+    live.ready = false;
+    for(const { reject } of pending.values()) reject(new Error("conexão ao vivo encerrada"));
+    pending.clear();
+  };
+  ws.onmessage = (e) => {
+    const frame = JSON.parse(e.data);
+    const waiting = frame.reply != null && pending.get(frame.reply);
+    if(!waiting) return onPush(frame);
+    pending.delete(frame.reply);
+    if(frame.type === "error") waiting.reject(new Error(frame.detail));
+    else waiting.resolve(frame);
+  };
+
+  // send("fight", 2) ou send([{action:"equip", idx:0}, {action:"end_turn"}])
+  live.send = (action, idx) => new Promise((resolve, reject) => {
+    const id = ++seq;
+    pending.set(id, { resolve, reject });
+    const body = Array.isArray(action) ? { id, actions: action } : { id, action, idx };
+    ws.send(JSON.stringify(body));
+  });
+  live.close = () => ws.close();
+  return live;
+}
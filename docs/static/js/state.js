@@ -1,5 +1,18 @@
 export const state = {
   run: null,
+  lastEvent: null,  // cursor do log (/events): id do último evento já mostrado
   get id(){ return this.run?.id || null; }
 };
 export function setRun(run){ state.run = run; }
+
+// resposta do servidor -> run completa (aplica delta sobre o estado atual)
+export function mergeRun(data){
+  if(!data.delta) return data;
+  const run = { ...state.run, ...data };
+  delete run.delta; delete run.since;
+  if(data.board){
+    run.board = [...state.run.board];
+    for(const [i, slot] of Object.entries(data.board)) run.board[+i] = slot;
+  }
+  return run;
+}
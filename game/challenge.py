@@ -0,0 +1,29 @@
+# game/challenge.py
+"""Desafio diário: a mesma seed para todo mundo durante o dia (TIME_ZONE).
+
+A seed sai de um HMAC do dia com SECRET_KEY: igual em todos os workers e
+reinícios, mas ninguém calcula (nem resolve) a seed de amanhã antes da
+hora. Todas as runs do dia usam o mesmo baralho, que fica no cache LRU de
+utils.new_deck_codes; o ranking da seed é GET /api/ranking?seed=<seed>.
+"""
+import hashlib
+import hmac
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+DAILY_PREFIX = "daily-"
+
+
+def daily_seed(day: date = None) -> str:
+    day = day or timezone.localdate()
+    digest = hmac.new(settings.SECRET_KEY.encode(), f"daily:{day.isoformat()}".encode(), hashlib.sha256)
+    return f"{DAILY_PREFIX}{day.isoformat()}-{digest.hexdigest()[:10]}"
+
+
+def daily_info(day: date = None) -> dict:
+    """{date, seed, ends_at} do desafio do dia (ends_at = próxima meia-noite local)."""
+    day = day or timezone.localdate()
+    ends_at = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return {"date": day.isoformat(), "seed": daily_seed(day), "ends_at": ends_at}
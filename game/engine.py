@@ -0,0 +1,330 @@
+# game/engine.py
+"""Motor do jogo em memória: regras puras, sem Django.
+
+Uso:
+    state, events = new_state("seed", 20)
+    state, events = apply(state, ("equip", 0))
+
+`apply` altera o estado recebido e devolve o mesmo objeto junto com a lista
+de eventos (texto) gerados. Uma jogada ilegal levanta `IllegalAction` antes
+de qualquer alteração.
+"""
+from typing import List, Optional, Tuple
+
+from .utils import new_deck_codes, CARD_SUIT, CARD_RANK, CARD_POWER, CARD_TYPE
+
+BOSS_BONUS = 6
+MAX_TURNS_SPEED = 26
+BOARD_SLOTS = 4
+ENEMY_HOLD_LIMIT = 2  # inimigo pode ficar no máximo 2 turnos mantido
+VICTORY_BONUS = 30
+COMBO_STEP = 0.20  # multiplicador do combo: 1 + COMBO_STEP*(combo_len-1)
+EMPTY = 0xFF  # slot vazio na forma empacotada da mesa
+
+# ações aceitas por apply(): (tipo, slot) — end_turn não usa slot
+SLOT_ACTIONS = ("equip", "discard", "use_heal", "fight", "pay_life")
+ACTIONS = SLOT_ACTIONS + ("end_turn",)
+ACTION_CODES = {kind: code for code, kind in enumerate(ACTIONS)}  # código gravado no log
+
+Action = Tuple[str, Optional[int]]
+
+
+class IllegalAction(Exception):
+    """Jogada recusada pelas regras; `detail` é a mensagem para o cliente."""
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class GameState:
+    """Estado de uma run com cartas como códigos 0..51 (ver game.utils).
+
+    deck/discard são bytearray (topo da deck = último); board tem um código
+    ou None por slot e held conta os turnos em que cada inimigo foi mantido.
+    """
+    __slots__ = (
+        "seed", "max_hp", "hp", "deck", "discard", "board", "held", "turn",
+        "emptied_this_turn", "status", "power", "score_total",
+        "equip_session", "combo_len", "session_points", "descida_ate2",
+        "final_scored",
+    )
+
+    def __init__(self, seed: str = "", max_hp: int = 20, hp: int = None,
+                 deck=None, discard=None, board=None, held=None, turn: int = 1,
+                 emptied_this_turn: int = 0, status: str = "ongoing",
+                 power: int = 0, score_total: int = 0, equip_session: int = 0,
+                 combo_len: int = 0, session_points: int = 0,
+                 descida_ate2: bool = False, final_scored: bool = False):
+        self.seed = seed
+        self.max_hp = max_hp
+        self.hp = max_hp if hp is None else hp
+        self.deck = bytearray(deck or b"")        # topo = último
+        self.discard = bytearray(discard or b"")
+        self.board = list(board) if board is not None else [None]*BOARD_SLOTS
+        self.held = list(held) if held is not None else [0]*BOARD_SLOTS
+        self.turn = turn
+        self.emptied_this_turn = emptied_this_turn
+        self.status = status
+        self.power = power
+        self.score_total = score_total
+        self.equip_session = equip_session
+        self.combo_len = combo_len
+        self.session_points = session_points
+        self.descida_ate2 = descida_ate2
+        self.final_scored = final_scored
+
+    def copy(self) -> "GameState":
+        # atribuições explícitas: copy() é o ponto quente do solver/simulador
+        s = GameState.__new__(GameState)
+        s.seed = self.seed
+        s.max_hp = self.max_hp
+        s.hp = self.hp
+        s.deck = bytearray(self.deck)
+        s.discard = bytearray(self.discard)
+        s.board = self.board[:]
+        s.held = self.held[:]
+        s.turn = self.turn
+        s.emptied_this_turn = self.emptied_this_turn
+        s.status = self.status
+        s.power = self.power
+        s.score_total = self.score_total
+        s.equip_session = self.equip_session
+        s.combo_len = self.combo_len
+        s.session_points = self.session_points
+        s.descida_ate2 = self.descida_ate2
+        s.final_scored = self.final_scored
+        return s
+
+    def __repr__(self):
+        return (f"GameState(T{self.turn} HP {self.hp}/{self.max_hp} PWR {self.power} "
+                f"SCORE {self.score_total} deck={len(self.deck)} {self.status})")
+
+# ---------------- mesa empacotada ----------------
+
+def pack_board(board, held) -> bytes:
+    """4 códigos (EMPTY = vazio) seguidos de 4 contadores de held."""
+    return bytes([EMPTY if c is None else c for c in board] + list(held))
+
+def unpack_board(raw) -> Tuple[list, list]:
+    raw = bytes(raw or b"")
+    if len(raw) != 2 * BOARD_SLOTS:
+        return [None]*BOARD_SLOTS, [0]*BOARD_SLOTS
+    board = [None if c == EMPTY else c for c in raw[:BOARD_SLOTS]]
+    return board, list(raw[BOARD_SLOTS:])
+
+# ---------------- helpers ----------------
+
+def _card_label(c: int) -> str:
+    return f"{CARD_SUIT[c]}-{CARD_RANK[c]}"
+
+def _refill_board(state: GameState, events: List[str]) -> bool:
+    """Completa slots vazios com cartas do topo da deck."""
+    changed = False
+    for i in range(BOARD_SLOTS):
+        if state.board[i] is None and state.deck:
+            c = state.deck.pop()
+            state.board[i] = c
+            state.held[i] = 0
+            events.append(f"Slot {i+1}: virou {CARD_TYPE[c]} {_card_label(c)}.")
+            changed = True
+    return changed
+
+def _require_slot(state: GameState, idx) -> int:
+    if not isinstance(idx, int) or idx < 0 or idx >= BOARD_SLOTS:
+        raise IllegalAction("slot inválido (0..3)")
+    c = state.board[idx]
+    if c is None:
+        raise IllegalAction("slot vazio")
+    return c
+
+def _clear_slot(state: GameState, idx: int, c: int):
+    state.discard.append(c)
+    state.board[idx] = None
+    state.held[idx] = 0
+    state.emptied_this_turn += 1
+
+def _finish_run_if_deck_ends(state: GameState, events: List[str]):
+    if state.status == "ongoing" and not state.deck:
+        # aplica bônus final só uma vez
+        if not state.final_scored:
+            speed_bonus = max(0, 2 * (MAX_TURNS_SPEED - state.turn))
+            state.score_total += VICTORY_BONUS + state.hp + speed_bonus
+            state.final_scored = True
+            events.append(f"Vitória! +{VICTORY_BONUS} +HP({state.hp}) +Speed({speed_bonus}). Score={state.score_total}.")
+        state.status = "won"
+
+def _score_kill(state: GameState, val: int, events: List[str]):
+    base = val + (BOSS_BONUS if val == 14 else 0)
+    state.combo_len += 1
+    mult = 1 + COMBO_STEP * (state.combo_len - 1)
+    pts = round(base * mult)
+    state.score_total += pts
+    state.session_points += pts
+    events.append(f"Kill {val}: +{pts} (combo {state.combo_len} ×{mult:.1f}). Score={state.score_total}.")
+    if val == 2 and not state.descida_ate2:
+        state.score_total += state.session_points  # dobra retroativo
+        state.descida_ate2 = True
+        events.append(f"BÔNUS descida até 2: +{state.session_points}.")
+
+# ---------------- ações ----------------
+
+def _equip(state: GameState, idx: int, events: List[str]):
+    c = _require_slot(state, idx)
+    if CARD_TYPE[c] != "weapon":
+        raise IllegalAction("slot não é arma")
+    val = CARD_POWER[c]
+
+    # iniciar nova sessão de equipamento
+    state.equip_session += 1
+    state.combo_len = 0
+    state.session_points = 0
+    state.descida_ate2 = False
+
+    state.power = val
+    _clear_slot(state, idx, c)
+    events.append(f"Equipou ♦️{val}. Sessão #{state.equip_session}. PWR={state.power}.")
+
+def _discard(state: GameState, idx: int, events: List[str]):
+    c = _require_slot(state, idx)
+    if CARD_TYPE[c] not in ("weapon", "heal"):
+        raise IllegalAction("para inimigo, use pay_life ou fight")
+    _clear_slot(state, idx, c)
+    events.append(f"Descartou {CARD_TYPE[c]} {_card_label(c)}.")
+
+def _use_heal(state: GameState, idx: int, events: List[str]):
+    c = _require_slot(state, idx)
+    if CARD_TYPE[c] != "heal":
+        raise IllegalAction("slot não é cura")
+    val = CARD_POWER[c]
+    state.hp = min(state.max_hp, state.hp + val)
+    _clear_slot(state, idx, c)
+    events.append(f"Usou ♥️{val}. HP={state.hp}.")
+
+def _fight(state: GameState, idx: int, events: List[str]):
+    c = _require_slot(state, idx)
+    if CARD_TYPE[c] != "enemy":
+        raise IllegalAction("slot não é inimigo")
+    val = CARD_POWER[c]
+    if state.power < val:
+        raise IllegalAction("poder insuficiente; pague vida ou mantenha")
+
+    # derrota: pontua + absorve valor
+    _score_kill(state, val, events)
+    state.power = val
+    _clear_slot(state, idx, c)
+
+def _pay_life(state: GameState, idx: int, events: List[str]):
+    c = _require_slot(state, idx)
+    if CARD_TYPE[c] != "enemy":
+        raise IllegalAction("slot não é inimigo")
+    val = CARD_POWER[c]
+    state.hp -= val
+    _clear_slot(state, idx, c)
+    events.append(f"Pagou {val} de vida para descartar inimigo. HP={state.hp}.")
+    if state.hp <= 0:
+        state.status = "lost"
+        events.append("Você caiu em batalha. Derrota.")
+
+def _end_turn(state: GameState, idx, events: List[str]):
+    """Avança turno se >=2 slots esvaziados e regras de manter ok."""
+    if state.emptied_this_turn < 2:
+        raise IllegalAction("você precisa esvaziar pelo menos 2 slots para terminar o turno")
+
+    # regras de manter: ♦️ não pode ficar; inimigos no máximo 2 turnos
+    board, held = state.board, state.held
+    for i, c in enumerate(board):
+        if c is not None and CARD_TYPE[c] == "weapon":
+            raise IllegalAction(f"arma no slot {i+1} não pode ser mantida; equipar ou descartar")
+    for i, c in enumerate(board):
+        if c is not None and CARD_TYPE[c] == "enemy" and held[i] + 1 > ENEMY_HOLD_LIMIT:
+            raise IllegalAction(f"inimigo no slot {i+1} já foi mantido por {ENEMY_HOLD_LIMIT} turnos; resolva-o")
+
+    # incrementar contadores de 'held' para inimigos
+    for i, c in enumerate(board):
+        if c is not None and CARD_TYPE[c] == "enemy":
+            held[i] += 1
+
+    state.turn += 1
+    state.emptied_this_turn = 0
+
+    # reabastece mesa
+    _refill_board(state, events)
+    _finish_run_if_deck_ends(state, events)
+    events.append(f"Início do turno {state.turn}.")
+
+_HANDLERS = {
+    "equip": _equip,
+    "discard": _discard,
+    "use_heal": _use_heal,
+    "fight": _fight,
+    "pay_life": _pay_life,
+    "end_turn": _end_turn,
+}
+
+# ---------------- API ----------------
+
+def new_state(seed: str, max_hp: int = 20) -> Tuple[GameState, List[str]]:
+    """Estado inicial de uma run: deck embaralhada pela seed e mesa virada."""
+    state = GameState(seed=seed, max_hp=max_hp, deck=new_deck_codes(seed))
+    events: List[str] = []
+    _refill_board(state, events)
+    events.append(f"Run iniciada. Seed={seed}.")
+    return state, events
+
+def parse_action(raw) -> Action:
+    """Converte `{"action": "equip", "idx": 0}` ou `["equip", 0]` em Action."""
+    if isinstance(raw, dict):
+        kind, idx = raw.get("action"), raw.get("idx")
+    elif isinstance(raw, (list, tuple)) and 1 <= len(raw) <= 2:
+        kind, idx = raw[0], (raw[1] if len(raw) > 1 else None)
+    else:
+        raise IllegalAction("ação malformada")
+    if kind not in ACTIONS:
+        raise IllegalAction(f"ação desconhecida: {kind}")
+    if kind in SLOT_ACTIONS and (not isinstance(idx, int) or isinstance(idx, bool)):
+        raise IllegalAction("slot inválido (0..3)")
+    return (kind, idx if kind in SLOT_ACTIONS else None)
+
+def apply(state: GameState, action: Action) -> Tuple[GameState, List[str]]:
+    """Aplica uma ação `(tipo, slot)` ao estado (in-place) e devolve (estado, eventos)."""
+    kind, idx = action[0], (action[1] if len(action) > 1 else None)
+    handler = _HANDLERS.get(kind)
+    if handler is None:
+        raise IllegalAction(f"ação desconhecida: {kind}")
+    if state.status != "ongoing":
+        raise IllegalAction("run finalizada")
+    events: List[str] = []
+    handler(state, idx, events)
+    return state, events
+
+def legal_actions(state: GameState) -> List[Action]:
+    """Todas as ações que apply() aceitaria agora, sem alterar o estado."""
+    if state.status != "ongoing":
+        return []
+    out: List[Action] = []
+    board, held = state.board, state.held
+    can_end = state.emptied_this_turn >= 2
+    for i, c in enumerate(board):
+        if c is None: continue
+        t = CARD_TYPE[c]
+        if t == "enemy":
+            if state.power >= CARD_POWER[c]:
+                out.append(("fight", i))
+            out.append(("pay_life", i))
+            if held[i] + 1 > ENEMY_HOLD_LIMIT: can_end = False
+        elif t == "weapon":
+            out.append(("equip", i))
+            out.append(("discard", i))
+            can_end = False
+        else:
+            out.append(("use_heal", i))
+            out.append(("discard", i))
+    if can_end:
+        out.append(("end_turn", None))
+    return out
+
+def replay(state: GameState, actions) -> GameState:
+    """Reaplica ações já aceitas (descarta os eventos). Determinístico pela seed."""
+    for action in actions:
+        apply(state, action)
+    return state
@@ -0,0 +1,181 @@
+# game/export.py
+"""Exportação em massa de scores e runs (CSV ou NDJSON, gzip opcional).
+
+    GET /api/export/<runs|scores>?format=csv|ndjson&gzip=1
+        &from=2026-01-01&to=2026-01-31&status=won&seed=abc
+    python manage.py export_data scores --format ndjson --gzip -o scores.ndjson.gz
+
+As linhas saem em lotes de `chunk_size` por keyset na chave primária
+(WHERE id > <último id> ORDER BY id LIMIT n): cada lote é uma query curta
+e independente — nada de OFFSET, nem cursor ou transação aberta durante a
+exportação inteira — e só um lote (de dicts, via .values()) fica em
+memória. O corpo é gerado aos blocos, então a resposta HTTP é streaming.
+"""
+import csv
+import hmac
+import zlib
+from datetime import datetime, time, timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db.models import F
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Run, Score
+
+CHUNK_SIZE = 2000
+BLOCK_BYTES = 64 * 1024
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+class Export(NamedTuple):
+    model: type
+    fields: tuple       # colunas na ordem do arquivo
+    annotations: dict   # colunas vindas de outra tabela
+    filters: dict       # filtro -> lookup (status/seed)
+
+
+EXPORTS = {
+    "runs": Export(Run, ("id", "created_at", "last_activity", "seed", "max_hp", "hp", "turn",
+                         "status", "score_total", "version"), {}, {"status": "status", "seed": "seed"}),
+    "scores": Export(Score, ("id", "run_id", "player_name", "points", "created_at", "seed", "status"),
+                     {"status": F("run__status")}, {"status": "run__status", "seed": "seed"}),
+}
+
+
+def parse_moment(value: str, end: bool = False):
+    """Data ISO (dia inteiro) ou data-hora; `end` torna a data um limite exclusivo."""
+    day = parse_date(value) if len(value) == 10 else None  # parse_datetime também aceitaria "AAAA-MM-DD"
+    at = datetime.combine(day + timedelta(days=end), time.min) if day else parse_datetime(value)
+    if at is None:
+        raise ValueError(f"data inválida: {value}")
+    return at if timezone.is_aware(at) else timezone.make_aware(at)
+
+
+def export_queryset(kind: str, since=None, until=None, status=None, seed=None):
+    """.values() filtrado de `kind`; datas em created_at (since <= x < until)."""
+    spec = EXPORTS[kind]
+    plain = [f for f in spec.fields if f not in spec.annotations]
+    qs = spec.model.objects.values(*plain, **spec.annotations)
+    if since is not None:
+        qs = qs.filter(created_at__gte=since)
+    if until is not None:
+        qs = qs.filter(created_at__lt=until)
+    if status:
+        qs = qs.filter(**{spec.filters["status"]: status})
+    if seed:
+        qs = qs.filter(**{spec.filters["seed"]: seed})
+    return qs
+
+
+def iter_chunks(qs, chunk_size: int = CHUNK_SIZE):
+    """Lotes (listas de dicts) de `qs`, um por query curta (keyset em pk)."""
+    qs, last = qs.order_by("pk"), None
+    while True:
+        rows = list((qs if last is None else qs.filter(pk__gt=last))[:chunk_size])
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]["id"]
+
+
+def iter_rows(qs, chunk_size: int = CHUNK_SIZE):
+    """Todas as linhas de `qs`, lote a lote (ver iter_chunks)."""
+    for rows in iter_chunks(qs, chunk_size):
+        yield from rows
+
+
+# ---------------- formatos ----------------
+
+class _Echo:
+    """"Arquivo" do csv.writer que só devolve a linha formatada."""
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_cell(row[f]) for f in fields])
+
+
+def ndjson_lines(rows, fields):
+    encoder = JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode({f: row[f] for f in fields}) + "\n"
+
+
+def _blocks(lines, compress: bool):
+    """Linhas -> blocos de ~BLOCK_BYTES (gzip se `compress`)."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buf, size = [], 0
+    for line in lines:
+        data = line.encode()
+        buf.append(data)
+        size += len(data)
+        if size >= BLOCK_BYTES:
+            block = b"".join(buf)
+            buf, size = [], 0
+            block = gz.compress(block) if gz else block
+            if block:
+                yield block
+    block = b"".join(buf)
+    if gz:
+        block = gz.compress(block) + gz.flush()
+    if block:
+        yield block
+
+
+def export_stream(kind: str, fmt: str = "csv", compress: bool = False,
+                  chunk_size: int = CHUNK_SIZE, **filters):
+    """Blocos de bytes do arquivo exportado (ver export_queryset para os filtros)."""
+    fields = EXPORTS[kind].fields
+    rows = iter_rows(export_queryset(kind, **filters), chunk_size)
+    lines = csv_lines(rows, fields) if fmt == "csv" else ndjson_lines(rows, fields)
+    return _blocks(lines, compress)
+
+
+# ---------------- view ----------------
+
+def _allowed(request) -> bool:
+    token = getattr(settings, "EXPORT_TOKEN", "")
+    auth = request.headers.get("Authorization", "").encode()  # bytes: str não-ASCII daria TypeError
+    if token and hmac.compare_digest(auth, f"Bearer {token}".encode()):
+        return True
+    user = getattr(request, "user", None)
+    return user is not None and user.is_staff
+
+
+@require_GET
+def export_view(request, kind):
+    """GET /api/export/<runs|scores> — staff ou `Authorization: Bearer <EXPORT_TOKEN>`."""
+    if not _allowed(request):
+        return JsonResponse({"detail": "sem permissão"}, status=403)
+    if kind not in EXPORTS:
+        return JsonResponse({"detail": "exporte 'runs' ou 'scores'"}, status=404)
+    fmt = request.GET.get("format", "csv")
+    if fmt not in FORMATS:
+        return JsonResponse({"detail": "format deve ser csv ou ndjson"}, status=400)
+    try:
+        since = parse_moment(request.GET["from"]) if request.GET.get("from") else None
+        until = parse_moment(request.GET["to"], end=True) if request.GET.get("to") else None
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+
+    compress = request.GET.get("gzip") == "1"
+    body = export_stream(kind, fmt, compress, since=since, until=until,
+                         status=request.GET.get("status"), seed=request.GET.get("seed"))
+    response = StreamingHttpResponse(body, content_type=FORMATS[fmt])
+    name = f"{kind}.{fmt}" + (".gz" if compress else "")
+    response["Content-Disposition"] = f'attachment; filename="{name}"'
+    return response
@@ -0,0 +1,76 @@
+# game/hints.py
+"""Jogadas legais e dica de melhor jogada, sem Django.
+
+A busca olha só o que o jogador vê: a mesa, hp, power e o combo. Como a
+mesa só é reabastecida em end_turn, ela explora as jogadas de slot do
+turno atual (no máximo BOARD_SLOTS) e trata end_turn como folha — nunca
+espia a deck. Cada folha vale
+
+    SCORE_WEIGHT*score + HP_WEIGHT*hp + power     (derrota: LOSS_VALUE)
+
+e o valor de um estado depende só da parte visível (o score entra como
+soma), então a busca é memoizada por essa chave num cache LRU comum a
+todas as runs: ordens diferentes das mesmas jogadas caem no mesmo estado.
+"""
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+from .engine import BOARD_SLOTS, GameState, Action, apply, legal_actions
+
+MAX_DEPTH = BOARD_SLOTS + 1  # todas as jogadas de slot do turno + end_turn
+SCORE_WEIGHT = 4
+HP_WEIGHT = 2
+LOSS_VALUE = -10_000
+HINT_CACHE_SIZE = 50_000
+
+
+class Hint(NamedTuple):
+    action: Action
+    line: Tuple[Action, ...]  # sequência sugerida (começa por `action`)
+    gain: int                 # valor da folha menos o valor atual
+
+
+def _value(state: GameState) -> int:
+    if state.status == "lost":
+        return LOSS_VALUE
+    return SCORE_WEIGHT * state.score_total + HP_WEIGHT * state.hp + state.power
+
+
+def _key(state: GameState) -> tuple:
+    return (tuple(state.board), tuple(state.held), state.hp, state.max_hp, state.power,
+            min(state.emptied_this_turn, 2), state.combo_len, state.session_points, state.descida_ate2)
+
+
+def _from_key(key: tuple) -> GameState:
+    board, held, hp, max_hp, power, emptied, combo_len, session_points, descida = key
+    return GameState(max_hp=max_hp, hp=hp, board=board, held=held, power=power,
+                     emptied_this_turn=emptied, combo_len=combo_len,
+                     session_points=session_points, descida_ate2=descida)
+
+
+@lru_cache(maxsize=HINT_CACHE_SIZE)
+def _best(key: tuple, depth: int) -> Tuple[int, Tuple[Action, ...]]:
+    """(ganho, linha) da melhor sequência de até `depth` jogadas a partir de `key`."""
+    state = _from_key(key)
+    base = _value(state)
+    best = None
+    for action in legal_actions(state):
+        if action[0] == "end_turn":
+            gain, line = 0, (action,)  # folha: o que vem da deck é desconhecido
+        else:
+            child = apply(state.copy(), action)[0]
+            gain, line = _value(child) - base, (action,)
+            if depth > 1 and child.status == "ongoing":
+                more, rest = _best(_key(child), depth - 1)
+                gain, line = gain + more, (action, *rest)
+        if best is None or gain > best[0]:
+            best = (gain, line)
+    return best or (0, ())
+
+
+def best_move(state: GameState, depth: int) -> Optional[Hint]:
+    """Melhor jogada pela busca limitada a `depth` (1..MAX_DEPTH); None se a run acabou."""
+    if state.status != "ongoing":
+        return None
+    gain, line = _best(_key(state), max(1, min(depth, MAX_DEPTH)))
+    return Hint(line[0], line, gain) if line else None
@@ -0,0 +1,186 @@
+# game/hotruns.py
+"""Cache write-behind das runs ativas (opcional, settings.RUN_HOT_CACHE).
+
+Com o cache ligado, a run fica em memória (LRU por processo, com TTL de
+inatividade) e as jogadas só mexem nela: as ações acumulam em `pending` e
+vão para o banco de uma vez (services.save_actions + eventos) num
+checkpoint:
+
+  - a jogada inclui end_turn ou termina a run;
+  - a primeira ação pendente tem mais de RUN_HOT_FLUSH_SECONDS (conferido
+    na jogada da própria run e a cada acesso ao cache, em qualquer run —
+    uma run parada é gravada pelo tráfego das outras);
+  - a entrada sai do LRU (tamanho ou TTL) ou o processo encerra.
+
+Recuperação: o motor é determinístico, então basta guardar a cauda
+(versão gravada + ações pendentes). Com RUN_HOT_SHARED, essa cauda também
+vai para o cache do Django a cada jogada; quem carregar a run depois
+(outro processo, ou este após um crash) reaplica a cauda sobre o banco e
+segue dali. Sem ela, um crash perde no máximo as ações desde o último
+checkpoint — o log gravado continua consistente.
+
+O cache supõe que as jogadas de uma run caem no mesmo processo (sessão
+fixa). Se outro processo gravar a run, o CAS do checkpoint falha: a
+entrada é descartada e a requisição recebe VersionConflict (play_actions
+recarrega do banco e tenta de novo).
+"""
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .engine import GameState, apply
+from .models import Run
+from .services import EventBuffer, VersionConflict, load_run, save_actions
+
+SHARED_PREFIX = "hot-run:"
+
+
+def enabled() -> bool:
+    return getattr(settings, "RUN_HOT_CACHE", False)
+
+
+class HotRun:
+    """Run em memória: estado atual + ações/eventos ainda não gravados."""
+    __slots__ = ("run", "state", "version", "durable", "pending", "events", "dirty_since", "touched", "lock")
+
+    def __init__(self, run: Run, state: GameState, version: int):
+        self.run = run
+        self.state = state
+        self.version = version        # versão em memória (inclui as pendentes)
+        self.durable = version        # versão gravada no banco
+        self.pending: List = []
+        self.events: List[str] = []
+        self.dirty_since: Optional[float] = None
+        self.touched = time.monotonic()
+        self.lock = threading.Lock()
+
+    def commit(self, state: GameState, actions: List, events: List[str]) -> int:
+        """Adota `state` após `actions`; grava se for hora de checkpoint."""
+        self.state = state
+        self.version += len(actions)
+        self.pending.extend(actions)
+        self.events.extend(events)
+        if self.dirty_since is None:
+            self.dirty_since = time.monotonic()
+        if (state.status != "ongoing"
+                or any(kind == "end_turn" for kind, _ in actions)
+                or time.monotonic() - self.dirty_since >= settings.RUN_HOT_FLUSH_SECONDS):
+            self.flush()
+        elif getattr(settings, "RUN_HOT_SHARED", False):
+            cache.set(SHARED_PREFIX + str(self.run.pk), (self.durable, self.pending), settings.RUN_HOT_CACHE_TTL)
+        return self.version
+
+    def flush(self):
+        """Checkpoint: CAS + ações + eventos pendentes numa transação."""
+        if not self.pending:
+            return
+        with transaction.atomic(), EventBuffer() as buf:
+            save_actions(self.run, self.state, self.durable, self.pending)
+            buf.extend(self.run, self.events)
+        self.durable = self.version
+        self.pending, self.events, self.dirty_since = [], [], None
+        if getattr(settings, "RUN_HOT_SHARED", False):
+            cache.delete(SHARED_PREFIX + str(self.run.pk))
+
+
+class HotRunCache:
+    """LRU de HotRun por id, com expiração por inatividade."""
+
+    def __init__(self):
+        self.entries: "OrderedDict[str, HotRun]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def peek(self, pk) -> Optional[HotRun]:
+        with self.lock:
+            return self.entries.get(str(pk))
+
+    @contextmanager
+    def entry(self, pk):
+        """HotRun da run `pk` travada para uma jogada (carrega do banco se preciso)."""
+        key = str(pk)
+        while True:
+            with self.lock:
+                hot = self.entries.get(key)
+            if hot is None:
+                loaded = self._load(pk)
+                with self.lock:
+                    # outra thread pode ter carregado no meio tempo: fica a primeira
+                    hot = self.entries.setdefault(key, loaded)
+            with self.lock:
+                if self.entries.get(key) is hot:
+                    self.entries.move_to_end(key)
+                    hot.touched = time.monotonic()  # antes da varredura: não expira pelo próprio acesso
+            self._evict(skip=key)
+            with hot.lock:
+                if self.peek(key) is not hot:
+                    # despejada (ou descartada) enquanto esperávamos: grava a
+                    # cauda aqui mesmo, para a recarga ler o banco em dia
+                    try:
+                        hot.flush()
+                    except VersionConflict:
+                        pass
+                    continue
+                try:
+                    yield hot
+                except VersionConflict:
+                    self.discard(key)
+                    raise
+                return
+
+    def discard(self, pk):
+        with self.lock:
+            self.entries.pop(str(pk), None)
+
+    def flush_all(self):
+        with self.lock:
+            entries = list(self.entries.values())
+        for hot in entries:
+            self._checkpoint(hot)
+
+    def _load(self, pk) -> HotRun:
+        run, state, seq = load_run(pk, lock=False)
+        hot = HotRun(run, state, seq)
+        tail = cache.get(SHARED_PREFIX + str(pk)) if getattr(settings, "RUN_HOT_SHARED", False) else None
+        if tail and tail[0] == seq:
+            # recuperação: reaplica as ações que não chegaram ao banco
+            events = []
+            for action in tail[1]:
+                events.extend(apply(state, action)[1])
+            hot.commit(state, list(tail[1]), events)
+        return hot
+
+    def _evict(self, skip=None):
+        """Despeja por tamanho/TTL e grava as entradas sujas há RUN_HOT_FLUSH_SECONDS."""
+        now = time.monotonic()
+        victims, stale = [], []
+        with self.lock:
+            while len(self.entries) > settings.RUN_HOT_CACHE_SIZE and next(iter(self.entries)) != skip:
+                victims.append(self.entries.popitem(last=False)[1])
+            for key, hot in list(self.entries.items()):
+                if key == skip:
+                    continue
+                if now - hot.touched > settings.RUN_HOT_CACHE_TTL:
+                    victims.append(self.entries.pop(key))
+                elif hot.dirty_since is not None and now - hot.dirty_since >= settings.RUN_HOT_FLUSH_SECONDS:
+                    stale.append(hot)
+        for hot in victims + stale:
+            self._checkpoint(hot)
+
+    @staticmethod
+    def _checkpoint(hot: HotRun):
+        with hot.lock:
+            try:
+                hot.flush()
+            except VersionConflict:
+                pass  # outro processo gravou a run; a cauda local é descartada
+
+
+hot_runs = HotRunCache()
+atexit.register(lambda: hot_runs.flush_all() if enabled() else None)
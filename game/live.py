@@ -0,0 +1,163 @@
+# game/live.py
+"""Canal ao vivo de uma run por WebSocket (ASGI puro, sem dependências extras).
+
+    ws://<host>/ws/run/<uuid>
+
+Ao conectar, o servidor manda {"type": "state", ...estado público}. O
+cliente envia {"id": 1, "action": "fight", "idx": 2} ou
+{"id": 2, "actions": [...]}. Cada jogada vira um frame
+{"type": "update", "events": [...], ...} para todas as conexões da mesma
+run; a conexão que jogou recebe também "reply": id. O frame é um delta
+("delta": true, "since": N, "version": M) quando a jogada partiu da última
+versão enviada a esta conexão; se a run andou por fora (HTTP, outro
+processo), vai o estado completo. Erros vão só para
+quem enviou: {"type": "error", "reply": id, "detail": ..., "index"?}.
+
+Os grupos por run (RunGroups) são uma camada de canais em memória: bastam
+para um servidor ASGI local de um processo. Com vários processos, conexões
+da mesma run em processos diferentes só veem as jogadas umas das outras ao
+reconectar.
+"""
+import asyncio
+import json
+import re
+import uuid
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from .engine import IllegalAction
+from .models import Run
+from .play import MAX_BATCH_ACTIONS, current_state, play_actions
+from .serializers import public_state, state_delta
+from .services import CorruptRunLog, VersionConflict
+
+PATH = re.compile(r"^/ws/run/(?P<pk>[0-9a-fA-F-]{32,36})/?$")
+
+
+class RunGroups:
+    """Filas das conexões abertas de cada run."""
+
+    def __init__(self):
+        self.groups = defaultdict(set)
+
+    def join(self, pk, queue: asyncio.Queue):
+        self.groups[pk].add(queue)
+
+    def leave(self, pk, queue: asyncio.Queue):
+        members = self.groups.get(pk)
+        if members is not None:
+            members.discard(queue)
+            if not members:
+                del self.groups[pk]
+
+    def send(self, pk, message: dict):
+        for queue in self.groups.get(pk, ()):
+            queue.put_nowait(message)
+
+
+groups = RunGroups()
+
+
+def _db(func):
+    """Roda `func` numa thread (ORM e motor fora do event loop), com conexões renovadas."""
+    def inner(*args):
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(inner)
+
+
+def _load(pk):
+    run, state, version = current_state(pk)
+    return public_state(state, run.id, version)
+
+
+def _play(pk, actions):
+    """(estado público, eventos, versão de onde a jogada partiu)."""
+    played = play_actions(pk, actions, batch=True)
+    return public_state(played.state, played.run.id, played.version), played.events, played.version - len(actions)
+
+
+def _parse(text):
+    """Frame do cliente -> (id, ações) ou ValueError."""
+    try:
+        msg = json.loads(text)
+    except ValueError:
+        raise ValueError("JSON inválido")
+    if not isinstance(msg, dict):
+        raise ValueError("envie um objeto JSON")
+    if "actions" not in msg:
+        return msg.get("id"), [msg]
+    actions = msg["actions"]
+    if not isinstance(actions, list) or not actions:
+        raise ValueError("envie uma lista 'actions' não vazia")
+    if len(actions) > MAX_BATCH_ACTIONS:
+        raise ValueError(f"no máximo {MAX_BATCH_ACTIONS} ações por mensagem")
+    return msg.get("id"), actions
+
+
+async def _pump(queue: asyncio.Queue, send, last: dict):
+    """Única tarefa que escreve no socket: deltas contra o último estado enviado.
+
+    O delta só vale se a jogada partiu da versão de `last`; senão o cliente
+    estaria aplicando-o sobre a base errada, e vai o estado completo.
+    """
+    while True:
+        msg = await queue.get()
+        if "error" in msg:
+            frame = {"type": "error", **msg["error"]}
+        else:
+            data = state_delta(last, msg["data"]) if msg["base"] == last["version"] else msg["data"]
+            frame = {"type": "update", **data, "events": msg["events"]}
+            if msg["origin"] is queue and msg["id"] is not None:
+                frame["reply"] = msg["id"]
+            last = msg["data"]
+        await send({"type": "websocket.send", "text": json.dumps(frame)})
+
+
+async def websocket_application(scope, receive, send):
+    if (await receive())["type"] != "websocket.connect":
+        return
+    try:
+        pk = uuid.UUID(PATH.match(scope["path"])["pk"])
+        data = await _db(_load)(pk)
+    except (TypeError, ValueError, Run.DoesNotExist):
+        await send({"type": "websocket.close", "code": 4404})
+        return
+    except CorruptRunLog:
+        await send({"type": "websocket.close", "code": 1011})  # erro interno
+        return
+    await send({"type": "websocket.accept"})
+    await send({"type": "websocket.send", "text": json.dumps({"type": "state", **data})})
+
+    queue = asyncio.Queue()
+    groups.join(pk, queue)
+    pump = asyncio.create_task(_pump(queue, send, data))
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message["type"] != "websocket.receive":
+                continue
+            msg_id = None
+            try:
+                msg_id, actions = _parse(message.get("text") or message.get("bytes") or "")
+                data, events, base = await _db(_play)(pk, actions)
+            except IllegalAction as e:
+                queue.put_nowait({"error": {"reply": msg_id, "detail": e.detail, "index": getattr(e, "index", 0)}})
+            except VersionConflict:
+                queue.put_nowait({"error": {"reply": msg_id, "detail": "a run mudou em outra requisição; recarregue"}})
+            except CorruptRunLog:
+                queue.put_nowait({"error": {"reply": msg_id, "detail": "log de ações da run corrompido"}})
+            except ValueError as e:
+                queue.put_nowait({"error": {"reply": msg_id, "detail": str(e) or "mensagem inválida"}})
+            else:
+                groups.send(pk, {"origin": queue, "id": msg_id, "data": data, "events": events, "base": base})
+    finally:
+        groups.leave(pk, queue)
+        pump.cancel()
@@ -0,0 +1,75 @@
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from game.export import iter_chunks
+from game.models import Run, RunAction, Score
+from game.verify import RunLog, check_batch
+
+
+class Command(BaseCommand):
+    help = "Confere por replay todos os scores do ranking (em processos paralelos) e aponta divergências."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="processos (ProcessPoolExecutor)")
+        parser.add_argument("--chunk-size", type=int, default=500, help="runs lidas por lote")
+        parser.add_argument("--seed", default="", help="só scores desta seed")
+
+    def handle(self, *args, **opts):
+        scores = Score.objects.filter(run__isnull=False)
+        if opts["seed"]:
+            scores = scores.filter(seed=opts["seed"])
+        runs = (Run.objects.filter(pk__in=scores.values("run_id"))
+                .values("id", "seed", "max_hp", "version", "status", "score_total", "replayable"))
+
+        t0 = time.perf_counter()
+        workers = max(1, opts["workers"])
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.checked = self.flagged = self.skipped = 0
+        pending = None
+        for chunk in iter_chunks(runs, opts["chunk_size"]):
+            logs, submitted = self._load(chunk, scores)
+            if pool:
+                futures = [pool.submit(check_batch, logs[i::workers]) for i in range(workers)]
+                results = (f.result() for f in futures)
+            else:
+                results = [check_batch(logs)]
+            # com workers, o lote seguinte sai do banco enquanto este é reaplicado
+            if pending:
+                self._report(*pending)
+            pending = (results, submitted)
+        if pending:
+            self._report(*pending)
+        if pool:
+            pool.shutdown()
+        self.stdout.write(f"{self.checked} score(s) conferidos em {time.perf_counter() - t0:.1f}s; "
+                          f"{self.flagged} divergente(s), {self.skipped} sem log de ações.")
+
+    def _load(self, chunk, scores):
+        """(RunLogs do lote, {run_id: [(player, pontos), ...]})."""
+        ids = [row["id"] for row in chunk if row["replayable"]]
+        actions = defaultdict(list)
+        for run_id, kind, idx in (RunAction.objects.filter(run_id__in=ids)
+                                  .order_by("run_id", "seq").values_list("run_id", "kind", "idx")):
+            actions[run_id].append((kind, idx))
+        submitted = defaultdict(list)
+        for run_id, player, points in (scores.filter(run_id__in=[row["id"] for row in chunk])
+                                       .values_list("run_id", "player_name", "points")):
+            submitted[run_id].append((player, points))
+        self.skipped += sum(len(submitted[row["id"]]) for row in chunk if not row["replayable"])
+        logs = [RunLog(row["id"], row["seed"], row["max_hp"], row["version"], row["status"],
+                       row["score_total"], actions[row["id"]]) for row in chunk if row["replayable"]]
+        return logs, submitted
+
+    def _report(self, results, submitted):
+        for checked in results:
+            for run_id, replayed, reason in checked:
+                for player, points in submitted[run_id]:
+                    self.checked += 1
+                    problem = reason or (None if points == replayed else f"replay dá {replayed} pts")
+                    if problem:
+                        self.flagged += 1
+                        self.stdout.write(self.style.WARNING(
+                            f"  {player} — {points} pts (run {run_id}): {problem}"))
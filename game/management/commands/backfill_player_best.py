@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from game.models import Score, PlayerBest
+
+
+class Command(BaseCommand):
+    help = "Recalcula a tabela PlayerBest (melhor score por jogador) a partir de Score."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    @transaction.atomic
+    def handle(self, *args, **opts):
+        rows = (Score.objects.values("player_name")
+                .annotate(points=Max("points"), last_at=Max("created_at"))
+                .order_by())
+        batch, total = [], 0
+        for row in rows.iterator(chunk_size=opts["batch_size"]):
+            batch.append(PlayerBest(**row))
+            if len(batch) >= opts["batch_size"]:
+                total += self._flush(batch)
+        total += self._flush(batch)
+        # jogadores cujos envios foram apagados
+        removed, _ = PlayerBest.objects.exclude(
+            player_name__in=Score.objects.values("player_name")).delete()
+        self.stdout.write(f"{total} jogador(es) atualizados, {removed} removido(s).")
+
+    def _flush(self, batch):
+        n = len(batch)
+        if n:
+            PlayerBest.objects.bulk_create(batch, update_conflicts=True, unique_fields=["player_name"],
+                                           update_fields=["points", "last_at"])
+            batch.clear()
+        return n
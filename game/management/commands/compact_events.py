@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from game.models import EventLog
+from game.services import compact_run_events
+
+
+class Command(BaseCommand):
+    help = "Compacta o EventLog de runs finalizadas num blob comprimido por run (EventArchive)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="ids por DELETE")
+        parser.add_argument("--limit", type=int, default=0, help="no máximo N runs nesta execução (0 = todas)")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        run_ids = (EventLog.objects.exclude(run__status="ongoing")
+                   .order_by("run_id").values_list("run_id", flat=True).distinct())
+        if opts["limit"]:
+            run_ids = run_ids[:opts["limit"]]
+        run_ids = list(run_ids)  # antes de apagar linhas da mesma tabela
+        if opts["dry_run"]:
+            rows = EventLog.objects.filter(run_id__in=run_ids).count()
+            self.stdout.write(f"{len(run_ids)} run(s), {rows} evento(s) seriam compactados.")
+            return
+        total = 0
+        for run_id in run_ids:
+            total += compact_run_events(run_id, opts["batch_size"])
+        self.stdout.write(f"{len(run_ids)} run(s) compactadas, {total} evento(s) arquivados.")
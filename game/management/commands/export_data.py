@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game.export import CHUNK_SIZE, EXPORTS, FORMATS, export_stream, parse_moment
+
+
+class Command(BaseCommand):
+    help = "Exporta runs ou scores em CSV/NDJSON (gzip opcional), em lotes, sem carregar tudo na memória."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("-o", "--output", default="-", help="arquivo de saída (- = stdout)")
+        parser.add_argument("--from", dest="since", default="", help="created_at >= data/data-hora ISO")
+        parser.add_argument("--to", dest="until", default="", help="created_at < data-hora (data: dia inteiro)")
+        parser.add_argument("--status", default="", help="status da run")
+        parser.add_argument("--seed", default="")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="linhas por query")
+
+    def handle(self, *args, **opts):
+        try:
+            since = parse_moment(opts["since"]) if opts["since"] else None
+            until = parse_moment(opts["until"], end=True) if opts["until"] else None
+        except ValueError as e:
+            raise CommandError(e)
+        blocks = export_stream(opts["kind"], opts["format"], opts["gzip"], opts["chunk_size"],
+                               since=since, until=until, status=opts["status"], seed=opts["seed"])
+        out = sys.stdout.buffer if opts["output"] == "-" else open(opts["output"], "wb")
+        try:
+            for block in blocks:
+                out.write(block)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
@@ -0,0 +1,50 @@
+import io
+import json
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game.profiling import profile_dir
+
+SORTS = ("cumulative", "tottime", "ncalls")
+
+
+class Command(BaseCommand):
+    help = "Lista os perfis gravados pelo ProfileMiddleware e resume as funções mais caras."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--route", default="", help="só perfis cuja rota contém este texto")
+        parser.add_argument("--run", default="", help="só perfis desta run (uuid)")
+        parser.add_argument("--last", type=int, default=0, help="só os N perfis mais recentes")
+        parser.add_argument("--top", type=int, default=25, help="funções no resumo")
+        parser.add_argument("--sort", choices=SORTS, default="cumulative")
+        parser.add_argument("--list", action="store_true", help="só lista, sem resumo")
+
+    def handle(self, *args, **opts):
+        folder = profile_dir()
+        metas = []
+        for path in sorted(folder.glob("*.json")):
+            meta = json.loads(path.read_text())
+            if opts["route"] not in meta["route"]:
+                continue
+            if opts["run"] and meta.get("run_id") != opts["run"]:
+                continue
+            if (folder / f"{meta['id']}.prof").exists():
+                metas.append(meta)
+        if opts["last"]:
+            metas = metas[-opts["last"]:]
+        if not metas:
+            raise CommandError(f"nenhum perfil em {folder}")
+
+        for m in metas:
+            self.stdout.write(f"{m['id']}  {m['method']} {m['path']}  {m['status']}  "
+                              f"{m['ms']:.1f} ms  ({m['trigger']})")
+        ms = sorted(m["ms"] for m in metas)
+        self.stdout.write(f"\n{len(metas)} perfil(s); mediana {ms[len(ms) // 2]:.1f} ms, máx {ms[-1]:.1f} ms")
+        if opts["list"]:
+            return
+
+        out = io.StringIO()  # pstats escreve em pedaços; OutputWrapper quebraria as linhas
+        stats = pstats.Stats(*(str(folder / f"{m['id']}.prof") for m in metas), stream=out)
+        stats.strip_dirs().sort_stats(opts["sort"]).print_stats(opts["top"])
+        self.stdout.write(out.getvalue())
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from game.models import Run
+from game.services import reap_idle_runs
+
+
+class Command(BaseCommand):
+    help = "Apaga (ou arquiva) runs em andamento sem jogadas há mais de --idle-hours."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--idle-hours", type=float, default=24)
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--max-batches", type=int, default=0, help="0 = até acabar")
+        parser.add_argument("--pause", type=float, default=0.05, help="segundos entre lotes")
+        parser.add_argument("--archive", action="store_true",
+                            help='mantém a run como "abandoned" e compacta os eventos em vez de apagar')
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        idle = timedelta(hours=opts["idle_hours"])
+        if opts["dry_run"]:
+            n = Run.objects.filter(status="ongoing", last_activity__lt=timezone.now() - idle).count()
+            self.stdout.write(f"{n} run(s) ociosas há mais de {opts['idle_hours']}h.")
+            return
+        n = reap_idle_runs(idle, opts["batch_size"], opts["max_batches"], opts["archive"], opts["pause"])
+        verb = "arquivada(s)" if opts["archive"] else "apagada(s)"
+        self.stdout.write(f"{n} run(s) {verb}.")
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game.sim import POLICIES, TUNABLES, simulate_chunk, merge, percentile, mean
+
+
+class Command(BaseCommand):
+    help = "Simula runs inteiras com o motor do jogo (sem HTTP/banco) e reporta estatísticas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seeds", type=int, default=1000, help="quantidade de runs/seeds")
+        parser.add_argument("--seed-prefix", default="sim-", help="seeds = <prefixo><n>")
+        parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+        parser.add_argument("--workers", type=int, default=1, help="processos (ProcessPoolExecutor)")
+        parser.add_argument("--chunk", type=int, default=2000, help="seeds por tarefa")
+        parser.add_argument("--max-hp", type=int, default=20)
+        parser.add_argument("--set", action="append", default=[], metavar="NOME=VALOR",
+                            help=f"sobrescreve constante do motor ({', '.join(TUNABLES)})")
+
+    def handle(self, *args, **opts):
+        overrides = {}
+        for item in opts["set"]:
+            name, _, value = item.partition("=")
+            if name not in TUNABLES or not value:
+                raise CommandError(f"--set inválido: {item!r} (use {'|'.join(TUNABLES)}=VALOR)")
+            overrides[name] = float(value) if "." in value else int(value)
+
+        n, size = opts["seeds"], max(1, opts["chunk"])
+        seeds = [f"{opts['seed_prefix']}{i}" for i in range(n)]
+        chunks = [seeds[i:i + size] for i in range(0, n, size)]
+        job = (opts["policy"], opts["max_hp"], overrides)
+
+        t0 = time.perf_counter()
+        total = {}
+        if opts["workers"] <= 1:
+            for chunk in chunks:
+                total = merge(total, simulate_chunk(chunk, *job))
+        else:
+            with ProcessPoolExecutor(max_workers=opts["workers"]) as pool:
+                futures = [pool.submit(simulate_chunk, chunk, *job) for chunk in chunks]
+                for f in futures:
+                    total = merge(total, f.result())
+        elapsed = time.perf_counter() - t0
+
+        runs = total.get("runs", 0)
+        if not runs:
+            self.stdout.write("Nenhuma run simulada.")
+            return
+        status, scores, turns = total["status"], total["scores"], total["turns"]
+        pct = lambda k: 100.0 * k / runs
+        self.stdout.write(f"policy={opts['policy']} runs={runs} workers={opts['workers']} "
+                          f"tempo={elapsed:.2f}s ({runs / elapsed:,.0f} runs/s)")
+        if overrides:
+            self.stdout.write("overrides: " + ", ".join(f"{k}={v}" for k, v in overrides.items()))
+        self.stdout.write(f"vitórias: {pct(status['won']):.2f}%  derrotas: {pct(status['lost']):.2f}%  "
+                          f"travadas: {pct(status['ongoing']):.2f}%")
+        self.stdout.write(f"score: média={mean(scores):.1f} p10={percentile(scores, 10)} "
+                          f"p50={percentile(scores, 50)} p90={percentile(scores, 90)} max={max(scores)}")
+        if turns:
+            self.stdout.write(f"turnos até o fim: média={mean(turns):.1f} p50={percentile(turns, 50)} "
+                              f"p90={percentile(turns, 90)}")
+        self.stdout.write(f"ENEMY_HOLD_LIMIT atingido: {pct(total['hold_hit']):.2f}%  "
+                          f"MAX_TURNS_SPEED atingido: {pct(total['speed_hit']):.2f}%")
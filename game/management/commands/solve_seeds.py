@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from game.models import Score, SeedPar
+from game.solver import solve_task
+
+
+class Command(BaseCommand):
+    help = "Calcula o score máximo (par) de seeds e aponta envios do ranking acima do par."
+
+    def add_arguments(self, parser):
+        parser.add_argument("seeds", nargs="*", help="seeds a resolver")
+        parser.add_argument("--from-scores", action="store_true",
+                            help="resolve todas as (seed, max_hp) com envio no ranking")
+        parser.add_argument("--max-hp", type=int, default=20, help="max_hp das seeds passadas na linha de comando (e dos envios sem run)")
+        parser.add_argument("--workers", type=int, default=1, help="processos (ProcessPoolExecutor)")
+        parser.add_argument("--node-limit", type=int, default=None,
+                            help="limite de estados por seed (par vira cota inferior se atingido)")
+        parser.add_argument("--save", action="store_true", help="grava o par em SeedPar")
+
+    def handle(self, *args, **opts):
+        tasks = {(seed, opts["max_hp"]) for seed in opts["seeds"]}
+        if opts["from_scores"]:
+            # envio sem run (run apagada) conta como --max-hp
+            tasks |= set(Score.objects.exclude(seed="")
+                         .values_list("seed", Coalesce("run__max_hp", Value(opts["max_hp"]))).distinct())
+        if not tasks:
+            raise CommandError("informe seeds ou use --from-scores")
+        tasks = [(seed, hp, opts["node_limit"]) for seed, hp in sorted(tasks)]
+
+        t0 = time.perf_counter()
+        if opts["workers"] <= 1:
+            flagged = self._report(map(solve_task, tasks), opts)
+        else:
+            with ProcessPoolExecutor(max_workers=opts["workers"]) as pool:
+                flagged = self._report(pool.map(solve_task, tasks), opts)
+        self.stdout.write(f"{len(tasks)} seed(s) em {time.perf_counter() - t0:.1f}s; {flagged} envio(s) suspeito(s).")
+
+    def _report(self, results, opts) -> int:
+        flagged = 0
+        for seed, max_hp, sol in results:
+            mark = "" if sol.exact else " (cota inferior)"
+            self.stdout.write(f"{seed!r} hp={max_hp}: par={sol.score}{mark} nós={sol.nodes}")
+            if opts["save"]:
+                SeedPar.objects.update_or_create(
+                    seed=seed, max_hp=max_hp,
+                    defaults={"par": sol.score, "exact": sol.exact, "nodes": sol.nodes,
+                              "solved_at": timezone.now()},
+                )
+            if sol.exact:
+                # acima do par exato = impossível pelas regras
+                same_hp = Q(run__max_hp=max_hp)
+                if max_hp == opts["max_hp"]:
+                    same_hp |= Q(run__isnull=True)
+                for s in Score.objects.filter(same_hp, seed=seed, points__gt=sol.score):
+                    flagged += 1
+                    self.stdout.write(self.style.WARNING(
+                        f"  impossível: {s.player_name} — {s.points} pts (run {s.run_id})"))
+        return flagged
@@ -0,0 +1,236 @@
+# game/metrics.py
+"""Métricas por rota, agregadas no processo e expostas em texto Prometheus.
+
+MetricsMiddleware mede cada requisição, rotulada pelo padrão de URL
+(resolver_match.route, ex. "api/run/<uuid:pk>/end_turn"; o parâmetro
+`mode` do ranking entra no rótulo):
+
+  - contagem por método/status e histograma de latência;
+  - queries e tempo de banco (execute_wrapper em toda conexão; a
+    requisição atual vem de um ContextVar, então conta também o que roda
+    em threads via sync_to_async);
+  - tempo de serialização (render do Response do DRF) e bytes da resposta.
+
+GET /api/metrics devolve tudo; com METRICS_TOKEN exige
+`Authorization: Bearer <token>`. Os contadores são por processo: com
+vários workers, o Prometheus soma as séries de cada um.
+"""
+import hmac
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 7, 10, 20, 50, 100)
+LABEL_PARAMS = {"mode": ("runs", "best", "daily")}  # querystring que vira rótulo (valores fechados)
+UNMATCHED = "<unmatched>"
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "render_start", "render_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_start = None
+        self.render_seconds = 0.0
+
+
+_current: ContextVar = ContextVar("request_metrics", default=None)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += perf_counter() - start
+
+
+def _instrument(conn):
+    if _db_wrapper not in conn.execute_wrappers:
+        conn.execute_wrappers.append(_db_wrapper)
+
+
+@receiver(connection_created)
+def _on_connection_created(sender, connection, **kwargs):
+    _instrument(connection)
+
+
+# ---------------- agregação ----------------
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # o último é +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        acc = 0
+        for bound, n in zip(self.buckets + ("+Inf",), self.counts):
+            acc += n
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {acc}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6g}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class RouteMetrics:
+    __slots__ = ("status", "latency", "queries", "db_seconds", "render_seconds", "bytes")
+
+    def __init__(self):
+        self.status = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.bytes = 0
+
+
+class Registry:
+    """Métricas por (rota, método); tudo sob um lock (seguro entre threads)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, route, method, status, seconds, stats: RequestStats, nbytes):
+        with self.lock:
+            m = self.routes.get((route, method))
+            if m is None:
+                m = self.routes[(route, method)] = RouteMetrics()
+            m.status[status] = m.status.get(status, 0) + 1
+            m.latency.observe(seconds)
+            m.queries.observe(stats.queries)
+            m.db_seconds += stats.db_seconds
+            m.render_seconds += stats.render_seconds
+            m.bytes += nbytes
+
+    def render(self) -> str:
+        with self.lock:
+            items = sorted(self.routes.items())
+            out = [
+                "# HELP hns_http_requests_total Requisições por rota, método e status.",
+                "# TYPE hns_http_requests_total counter",
+            ]
+            for (route, method), m in items:
+                for status, n in sorted(m.status.items()):
+                    out.append(f'hns_http_requests_total{{{_labels(route, method)},status="{status}"}} {n}')
+            for name, kind, help_text, attr in (
+                ("hns_http_request_duration_seconds", "histogram", "Latência da requisição.", "latency"),
+                ("hns_db_queries_per_request", "histogram", "Queries de banco por requisição.", "queries"),
+            ):
+                out += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for (route, method), m in items:
+                    out.extend(getattr(m, attr).lines(name, _labels(route, method)))
+            for name, help_text, attr, fmt in (
+                ("hns_db_seconds_total", "Tempo gasto em queries.", "db_seconds", "{:.6f}"),
+                ("hns_render_seconds_total", "Tempo de serialização da resposta.", "render_seconds", "{:.6f}"),
+                ("hns_response_bytes_total", "Bytes de corpo enviados.", "bytes", "{}"),
+            ):
+                out += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (route, method), m in items:
+                    out.append(f"{name}{{{_labels(route, method)}}} {fmt.format(getattr(m, attr))}")
+        return "\n".join(out) + "\n"
+
+
+def _labels(route, method):
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'route="{route}",method="{method}"'
+
+
+registry = Registry()
+
+
+# ---------------- middleware / view ----------------
+
+def _route(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNMATCHED
+    route = match.route
+    for param, allowed in LABEL_PARAMS.items():
+        value = request.GET.get(param)
+        if value in allowed:
+            route += f"?{param}={value}"
+    return route
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self._acall(request)
+        _instrument(connection)
+        stats, start = RequestStats(), perf_counter()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, stats, start)
+        return response
+
+    async def _acall(self, request):
+        stats, start = RequestStats(), perf_counter()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, stats, start)
+        return response
+
+    def process_template_response(self, request, response):
+        # Response do DRF renderiza depois da view: mede só a serialização
+        stats = _current.get()
+        if stats is not None:
+            stats.render_start = perf_counter()
+            response.add_post_render_callback(lambda r: _rendered(stats))
+        return response
+
+    @staticmethod
+    def _finish(request, response, stats, start):
+        nbytes = 0 if response.streaming else len(response.content)
+        registry.observe(_route(request), request.method, response.status_code,
+                         perf_counter() - start, stats, nbytes)
+
+
+def _rendered(stats: RequestStats):
+    stats.render_seconds += perf_counter() - stats.render_start
+
+
+def metrics_view(request):
+    """GET /api/metrics — texto no formato de exposição do Prometheus."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    auth = request.headers.get("Authorization", "").encode()  # bytes: str não-ASCII daria TypeError
+    if token and not hmac.compare_digest(auth, f"Bearer {token}".encode()):
+        return HttpResponse(status=403)
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
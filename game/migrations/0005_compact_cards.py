@@ -0,0 +1,113 @@
+# Converte deck/discard/board de listas JSON de dicts para bytes com códigos 0..51.
+
+from django.db import migrations, models
+
+SUITS = ['clubs', 'spades', 'hearts', 'diamonds']
+RANKS = [2, 3, 4, 5, 6, 7, 8, 9, 10, 'J', 'Q', 'K', 'A']
+BOARD_SLOTS = 4
+EMPTY = 0xFF
+
+
+def _code(card):
+    return SUITS.index(card['suit']) * 13 + RANKS.index(card['rank'])
+
+
+def _is_card(c):
+    # runs do formato antigo (antes da 0003) têm armas {"name", "bonus", "uses"} no lugar de cartas
+    return isinstance(c, dict) and c.get('suit') in SUITS and c.get('rank') in RANKS
+
+
+def _slot(s):
+    return s['card'] if isinstance(s, dict) and _is_card(s.get('card')) else None
+
+
+def _card(code):
+    s, r = SUITS[code // 13], RANKS[code % 13]
+    return {"id": f"{s}-{r}", "suit": s, "rank": r}
+
+
+def _classify(suit):
+    if suit in ('clubs', 'spades'): return 'enemy'
+    if suit == 'hearts': return 'heal'
+    return 'weapon'
+
+
+def json_to_bytes(apps, schema_editor):
+    Run = apps.get_model('game', 'Run')
+    for run in Run.objects.all().iterator(chunk_size=500):
+        board = run.board if isinstance(run.board, list) and len(run.board) == BOARD_SLOTS else [None] * BOARD_SLOTS
+        cards = [_slot(s) for s in board]
+        run.deck_b = bytes(_code(c) for c in (run.deck or []) if _is_card(c))
+        run.discard_b = bytes(_code(c) for c in (run.discard or []) if _is_card(c))
+        run.board_b = bytes([EMPTY if c is None else _code(c) for c in cards]
+                            + [0 if c is None else int(s.get('held', 0)) for c, s in zip(cards, board)])
+        run.save(update_fields=['deck_b', 'discard_b', 'board_b'])
+
+
+def bytes_to_json(apps, schema_editor):
+    Run = apps.get_model('game', 'Run')
+    for run in Run.objects.all().iterator(chunk_size=500):
+        raw = bytes(run.board_b or b"")
+        board = [None] * BOARD_SLOTS
+        if len(raw) == 2 * BOARD_SLOTS:
+            for i in range(BOARD_SLOTS):
+                if raw[i] != EMPTY:
+                    card = _card(raw[i])
+                    board[i] = {"card": card, "type": _classify(card['suit']), "held": raw[BOARD_SLOTS + i]}
+        run.deck = [_card(c) for c in bytes(run.deck_b or b"")]
+        run.discard = [_card(c) for c in bytes(run.discard_b or b"")]
+        run.board = board
+        run.save(update_fields=['deck', 'discard', 'board'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0004_alter_score_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='run',
+            name='deck_b',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.AddField(
+            model_name='run',
+            name='discard_b',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.AddField(
+            model_name='run',
+            name='board_b',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(json_to_bytes, bytes_to_json),
+        migrations.RemoveField(
+            model_name='run',
+            name='deck',
+        ),
+        migrations.RemoveField(
+            model_name='run',
+            name='discard',
+        ),
+        migrations.RemoveField(
+            model_name='run',
+            name='board',
+        ),
+        migrations.RenameField(
+            model_name='run',
+            old_name='deck_b',
+            new_name='deck',
+        ),
+        migrations.RenameField(
+            model_name='run',
+            old_name='discard_b',
+            new_name='discard',
+        ),
+        migrations.RenameField(
+            model_name='run',
+            old_name='board_b',
+            new_name='board',
+        ),
+    ]
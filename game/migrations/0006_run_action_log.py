@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0005_compact_cards'),
+    ]
+
+    operations = [
+        # runs existentes não têm log de ações: não dá para reconstruir pela seed
+        migrations.AddField(
+            model_name='run',
+            name='replayable',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='run',
+            name='replayable',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='run',
+            name='snapshot_seq',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='RunAction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField()),
+                ('kind', models.PositiveSmallIntegerField(choices=[(0, 'equip'), (1, 'discard'), (2, 'use_heal'), (3, 'fight'), (4, 'pay_life'), (5, 'end_turn')])),
+                ('idx', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actions', to='game.run')),
+            ],
+            options={
+                'ordering': ['run', 'seq'],
+                'constraints': [models.UniqueConstraint(fields=('run', 'seq'), name='uniq_action_per_run_seq')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0006_run_action_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeedPar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seed', models.CharField(max_length=64)),
+                ('max_hp', models.IntegerField(default=20)),
+                ('par', models.IntegerField()),
+                ('exact', models.BooleanField(default=True)),
+                ('nodes', models.IntegerField(default=0)),
+                ('solved_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('seed', 'max_hp'), name='uniq_par_per_seed_hp')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:53
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill(apps, schema_editor):
+    Score = apps.get_model('game', 'Score')
+    PlayerBest = apps.get_model('game', 'PlayerBest')
+    rows = (Score.objects.values('player_name')
+            .annotate(points=Max('points'), last_at=Max('created_at'))
+            .order_by())
+    PlayerBest.objects.bulk_create([PlayerBest(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0007_seed_par'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerBest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player_name', models.CharField(max_length=30, unique=True)),
+                ('points', models.IntegerField(default=0)),
+                ('last_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-points', '-last_at'],
+                'indexes': [models.Index(fields=['-points', '-last_at'], name='game_player_points_78b487_idx')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0008_player_best'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='playerbest',
+            name='game_player_points_78b487_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='score',
+            name='game_score_points_0ff2c1_idx',
+        ),
+        migrations.AddIndex(
+            model_name='playerbest',
+            index=models.Index(fields=['-points', '-last_at', '-id'], name='game_player_points_7f03f4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['-points', '-created_at', '-id'], name='game_score_points_c099e9_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:57
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def set_version(apps, schema_editor):
+    # versão = seq da última ação gravada de cada run
+    Run = apps.get_model('game', 'Run')
+    RunAction = apps.get_model('game', 'RunAction')
+    last = RunAction.objects.filter(run=OuterRef('pk')).order_by('-seq').values('seq')[:1]
+    Run.objects.update(version=Coalesce(Subquery(last), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0009_ranking_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='run',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(set_version, migrations.RunPython.noop),
+    ]
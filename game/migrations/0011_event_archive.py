@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0010_run_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventArchive',
+            fields=[
+                ('run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='event_archive', serialize=False, to='game.run')),
+                ('data', models.BinaryField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('compacted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:15
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_last_activity(apps, schema_editor):
+    # última ação gravada; runs sem ações usam created_at
+    Run = apps.get_model('game', 'Run')
+    RunAction = apps.get_model('game', 'RunAction')
+    last = RunAction.objects.filter(run=OuterRef('pk')).order_by('-seq').values('created_at')[:1]
+    Run.objects.update(last_activity=Coalesce(Subquery(last), F('created_at')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0011_event_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='run',
+            name='last_activity',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_last_activity, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='run',
+            name='status',
+            field=models.CharField(choices=[('ongoing', 'ongoing'), ('won', 'won'), ('lost', 'lost'), ('abandoned', 'abandoned')], default='ongoing', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='run',
+            index=models.Index(fields=['status', 'last_activity'], name='run_status_activity_idx'),
+        ),
+    ]
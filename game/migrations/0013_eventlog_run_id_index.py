@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0012_run_last_activity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventlog',
+            index=models.Index(fields=['run', 'id'], name='eventlog_run_id_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_score_seed(apps, schema_editor):
+    # scores de runs apagadas ficam com seed ""
+    Run = apps.get_model('game', 'Run')
+    Score = apps.get_model('game', 'Score')
+    seed = Run.objects.filter(pk=OuterRef('run_id')).values('seed')[:1]
+    Score.objects.update(seed=Coalesce(Subquery(seed), Value('')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0013_eventlog_run_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='score',
+            name='seed',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.RunPython(backfill_score_seed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='run',
+            index=models.Index(fields=['seed'], name='run_seed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['seed', '-points', '-created_at', '-id'], name='score_seed_rank_idx'),
+        ),
+    ]
@@ -1,7 +1,12 @@
 from django.db import models
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+import json
 import uuid
+import zlib
+from datetime import datetime
+
+from .engine import GameState, ACTIONS, pack_board, unpack_board
 
 class Run(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -9,9 +14,10 @@ class Run(models.Model):
 
     # baralho / estado
     seed = models.CharField(max_length=64)
-    deck = models.JSONField(default=list)       # cartas restantes (topo = último)
-    discard = models.JSONField(default=list)    # histórico de cartas resolvidas
-    board = models.JSONField(default=list)      # 4 slots: [None | {card,type,held:int}]
+    # cartas como códigos 0..51 (ver game.utils); dicts só no serializer
+    deck = models.BinaryField(default=bytes)     # cartas restantes (topo = último)
+    discard = models.BinaryField(default=bytes)  # histórico de cartas resolvidas
+    board = models.BinaryField(default=bytes)    # 4 códigos (0xFF = vazio) + 4 contadores held
 
     # vida / turno
     max_hp = models.IntegerField(default=20)
@@ -21,9 +27,10 @@ class Run(models.Model):
 
     status = models.CharField(
         max_length=10,
-        choices=[("ongoing","ongoing"),("won","won"),("lost","lost")],
+        choices=[("ongoing","ongoing"),("won","won"),("lost","lost"),("abandoned","abandoned")],
         default="ongoing"
     )
+    last_activity = models.DateTimeField(default=timezone.now)  # última jogada gravada (reap_runs)
 
     # “pilha de equipamento” (poder atual)
     power = models.IntegerField(default=0)
@@ -36,14 +43,95 @@ class Run(models.Model):
     descida_ate2 = models.BooleanField(default=False)
     final_scored = models.BooleanField(default=False)
 
+    # event sourcing: os campos de estado acima são um snapshot após a ação
+    # `snapshot_seq`; o estado atual = snapshot + RunAction com seq maior.
+    snapshot_seq = models.PositiveIntegerField(default=0)
+    version = models.PositiveIntegerField(default=0)  # seq da última ação (CAS otimista)
+    replayable = models.BooleanField(default=True)  # False: run anterior ao log de ações
+
+    STATE_SCALARS = (
+        "seed", "max_hp", "hp", "turn", "emptied_this_turn", "status", "power",
+        "score_total", "equip_session", "combo_len", "session_points",
+        "descida_ate2", "final_scored",
+    )
+    STATE_FIELDS = STATE_SCALARS + ("deck", "discard", "board")
+
+    class Meta:
+        indexes = [
+            # varredura de runs abandonadas (reap_runs)
+            models.Index(fields=["status", "last_activity"], name="run_status_activity_idx"),
+            models.Index(fields=["seed"], name="run_seed_idx"),
+        ]
+
+    def to_state(self) -> GameState:
+        """Copia o estado persistido para um GameState do motor."""
+        board, held = unpack_board(self.board)
+        return GameState(deck=self.deck, discard=self.discard, board=board, held=held,
+                         **{name: getattr(self, name) for name in self.STATE_SCALARS})
+
+    def load_state(self, state: GameState):
+        """Copia um GameState de volta para os campos (sem salvar)."""
+        for name in self.STATE_SCALARS:
+            setattr(self, name, getattr(state, name))
+        self.deck = bytes(state.deck)
+        self.discard = bytes(state.discard)
+        self.board = pack_board(state.board, state.held)
+
     def __str__(self):
         return f"Run {self.id} | T{self.turn} | HP {self.hp}/{self.max_hp} | PWR {self.power} | SCORE {self.score_total}"
 
+class RunAction(models.Model):
+    """Log append-only e tipado das ações aceitas de uma run (seq = 1, 2, 3...)."""
+    run = models.ForeignKey(Run, on_delete=models.CASCADE, related_name="actions")
+    seq = models.PositiveIntegerField()
+    kind = models.PositiveSmallIntegerField(choices=list(enumerate(ACTIONS)))
+    idx = models.PositiveSmallIntegerField(null=True, blank=True)  # slot 0..3; None p/ end_turn
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["run", "seq"]
+        constraints = [
+            models.UniqueConstraint(fields=["run", "seq"], name="uniq_action_per_run_seq")
+        ]
+
+    def as_action(self):
+        return (ACTIONS[self.kind], self.idx)
+
 class EventLog(models.Model):
     run = models.ForeignKey(Run, on_delete=models.CASCADE, related_name="events")
     created_at = models.DateTimeField(default=timezone.now)
     text = models.TextField()
 
+    class Meta:
+        indexes = [
+            # leitura incremental: WHERE run_id = ? AND id > ? ORDER BY id
+            models.Index(fields=["run", "id"], name="eventlog_run_id_idx"),
+        ]
+
+class EventArchive(models.Model):
+    """Eventos de uma run finalizada compactados num blob (ver compact_events).
+
+    `data` = zlib(JSON [[id, created_at ISO, texto], ...]) em ordem de id;
+    as linhas de EventLog correspondentes são apagadas. Leia pelos
+    helpers de services (run_events), que juntam arquivo + linhas vivas.
+    """
+    run = models.OneToOneField(Run, on_delete=models.CASCADE, primary_key=True, related_name="event_archive")
+    data = models.BinaryField()
+    count = models.PositiveIntegerField(default=0)
+    last_id = models.BigIntegerField(default=0)  # maior EventLog.id arquivado
+    compacted_at = models.DateTimeField(default=timezone.now)
+
+    @staticmethod
+    def pack(rows) -> bytes:
+        """[(id, created_at, texto), ...] -> blob comprimido."""
+        raw = [[pk, at.isoformat(), text] for pk, at, text in rows]
+        return zlib.compress(json.dumps(raw, ensure_ascii=False, separators=(",", ":")).encode(), 9)
+
+    def rows(self) -> list:
+        """Blob -> [(id, created_at, texto), ...]."""
+        raw = json.loads(zlib.decompress(bytes(self.data)))
+        return [(pk, datetime.fromisoformat(at), text) for pk, at, text in raw]
+
 class Roll(models.Model):
     run = models.ForeignKey(Run, on_delete=models.CASCADE, related_name="rolls")
     d20 = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(20)])
@@ -59,6 +147,7 @@ class Score(models.Model):
     player_name = models.CharField(max_length=30)
     points = models.IntegerField(default=0)
     created_at = models.DateTimeField(default=timezone.now)
+    seed = models.CharField(max_length=64, default="")  # cópia de run.seed (ranking por seed)
 
     class Meta:
         ordering = ["-points", "-created_at"]
@@ -67,5 +156,35 @@ class Score(models.Model):
         ]
         indexes = [
             models.Index(fields=["player_name"]),
-            models.Index(fields=["-points"]),
+            # ordem do ranking / cursor de paginação
+            models.Index(fields=["-points", "-created_at", "-id"]),
+            # ranking de uma seed (desafio diário): mesma ordem, prefixada pela seed
+            models.Index(fields=["seed", "-points", "-created_at", "-id"], name="score_seed_rank_idx"),
+        ]
+
+
+class PlayerBest(models.Model):
+    """Melhor score de cada jogador, mantido por SubmitScoreView (ranking mode=best)."""
+    player_name = models.CharField(max_length=30, unique=True)
+    points = models.IntegerField(default=0)
+    last_at = models.DateTimeField(default=timezone.now)  # envio mais recente do jogador
+
+    class Meta:
+        ordering = ["-points", "-last_at"]
+        indexes = [
+            models.Index(fields=["-points", "-last_at", "-id"]),
+        ]
+
+class SeedPar(models.Model):
+    """Score máximo alcançável ("par") de uma seed, calculado por game.solver."""
+    seed = models.CharField(max_length=64)
+    max_hp = models.IntegerField(default=20)
+    par = models.IntegerField()
+    exact = models.BooleanField(default=True)  # False: busca cortada, par é cota inferior
+    nodes = models.IntegerField(default=0)
+    solved_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["seed", "max_hp"], name="uniq_par_per_seed_hp")
         ]
@@ -0,0 +1,116 @@
+# game/play.py
+"""Jogadas sobre runs persistidas, independentes do transporte.
+
+Usado pelas views HTTP e pelo canal WebSocket (live.py): carrega a run
+(do banco ou do cache quente), aplica as ações no motor e persiste.
+"""
+from typing import List, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from . import hotruns
+from .engine import GameState, IllegalAction, apply, new_state, parse_action
+from .models import Run
+from .serializers import public_state, state_delta
+from .services import EventBuffer, VersionConflict, load_run, load_state, save_actions, state_at
+
+MAX_BATCH_ACTIONS = 32  # por requisição/mensagem
+
+
+class Played(NamedTuple):
+    run: Run
+    state: GameState
+    version: int
+    before: Optional[GameState]  # estado na versão `since`, se era a versão lida
+    events: List[str]
+
+
+@transaction.atomic
+def start_run(seed: str, max_hp: int):
+    """Cria a run com o estado inicial da seed e grava os eventos de início."""
+    state, events = new_state(seed, max_hp)
+    run = Run()
+    run.load_state(state)
+    run.save()
+    with EventBuffer() as buf:
+        buf.extend(run, events)
+    return run, state
+
+
+def current_state(pk):
+    """(run, estado, versão) atuais; com o cache quente inclui a cauda não gravada."""
+    if hotruns.enabled():
+        with hotruns.hot_runs.entry(pk) as hot:
+            return hot.run, hot.state, hot.version
+    run = Run.objects.get(pk=pk)
+    state, version = load_state(run)
+    return run, state, version
+
+
+def state_payload(run, state, version, since=None, before=None) -> dict:
+    """Estado público da run; com `since` só o que mudou desde aquela versão.
+
+    `before` (estado na versão `since`) evita reconstruir pelo log.
+    """
+    data = public_state(state, run.id, version)
+    if since is not None and since <= version:
+        old = before if before is not None else state_at(run, since)
+        if old is not None:
+            data = state_delta(public_state(old, run.id, since), data)
+    return data
+
+
+def play_actions(pk, actions, batch=False, since=None) -> Played:
+    """Aplica e persiste as ações da run `pk` como uma jogada só.
+
+    Se alguma ação for ilegal nada é gravado e sai IllegalAction com
+    `index` = posição da ação recusada. No modo otimista, se outra
+    requisição gravou antes, recarrega e tenta de novo (RUN_CAS_RETRIES);
+    esgotadas as tentativas, sai o VersionConflict. Com RUN_HOT_CACHE a
+    jogada vai para a run em memória e só chega ao banco no próximo
+    checkpoint (ver hotruns).
+    """
+    retries = getattr(settings, "RUN_CAS_RETRIES", 2)
+    for attempt in range(retries + 1):
+        try:
+            if hotruns.enabled():
+                return _play_hot(pk, actions, batch, since)
+            with transaction.atomic():
+                return _play_once(pk, actions, batch, since)
+        except VersionConflict:
+            if attempt == retries:
+                raise
+
+
+def _apply_all(state, actions, batch):
+    applied, events = [], []
+    for i, action in enumerate(actions):
+        try:
+            if batch: action = parse_action(action)
+            _, evs = apply(state, action)
+        except IllegalAction as e:
+            e.index = i
+            raise
+        applied.append(action)
+        events.extend(evs)
+    return applied, events
+
+
+def _play_once(pk, actions, batch, since):
+    run, state, seq = load_run(pk)
+    before = state.copy() if since == seq else None
+    applied, events = _apply_all(state, actions, batch)
+    version = save_actions(run, state, seq, applied)
+    with EventBuffer() as buf:
+        buf.extend(run, events)
+    return Played(run, state, version, before, events)
+
+
+def _play_hot(pk, actions, batch, since):
+    with hotruns.hot_runs.entry(pk) as hot:
+        before = hot.state if since == hot.version else None
+        state = hot.state.copy()
+        applied, events = _apply_all(state, actions, batch)
+        version = hot.commit(state, applied, events)
+        return Played(hot.run, state, version, before, events)
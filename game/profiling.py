@@ -0,0 +1,103 @@
+# game/profiling.py
+"""Perfil (cProfile) sob demanda de uma requisição.
+
+ProfileMiddleware roda a requisição inteira sob cProfile quando:
+
+  - `X-Profile: <PROFILE_TOKEN>` ou `?_profile=<PROFILE_TOKEN>` (segredo);
+  - `X-Profile: 1` ou `?_profile=1` vindo de usuário staff logado;
+  - amostragem: random() < PROFILE_SAMPLE_RATE (0 = desligado).
+
+Cada perfil vai para PROFILE_DIR como <id>.prof (pstats) + <id>.json
+(rota, caminho, run, status, tempo, gatilho). A resposta leva
+`X-Profile-Id: <id>`. `python manage.py profiles` lista e resume.
+
+Só sob WSGI (pilha de middleware síncrona): sob ASGI a requisição passa
+sem perfil, porque o cProfile mediria junto as outras corrotinas do loop.
+"""
+import cProfile
+import hmac
+import json
+import random
+import re
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+def profile_dir() -> Path:
+    return Path(getattr(settings, "PROFILE_DIR", "profiles"))
+
+
+def _trigger(request):
+    """Motivo para perfilar esta requisição, ou None."""
+    flag = request.headers.get("X-Profile") or request.GET.get("_profile")
+    if flag:
+        token = getattr(settings, "PROFILE_TOKEN", "")
+        if token and hmac.compare_digest(flag.encode(), token.encode()):  # bytes: str não-ASCII daria TypeError
+            return "token"
+        user = getattr(request, "user", None)
+        if flag == "1" and user is not None and user.is_staff:
+            return "staff"
+    rate = getattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+    if rate and random.random() < rate:
+        return "sample"
+    return None
+
+
+def _slug(route: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", route.lower()).strip("-") or "root"
+
+
+class ProfileMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.get_response(request)  # sem perfil (ver docstring do módulo)
+        trigger = _trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        start = perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        seconds = perf_counter() - start
+        response["X-Profile-Id"] = self._save(request, response, profiler, seconds, trigger)
+        return response
+
+    @staticmethod
+    def _save(request, response, profiler, seconds, trigger) -> str:
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else request.path
+        at = datetime.now(timezone.utc)
+        name = f"{at:%Y%m%dT%H%M%S}-{_slug(route)}-{uuid.uuid4().hex[:8]}"
+        folder = profile_dir()
+        folder.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(folder / f"{name}.prof")
+        meta = {
+            "id": name,
+            "route": route,
+            "path": request.get_full_path(),
+            "method": request.method,
+            "run_id": str(match.kwargs["pk"]) if match and "pk" in match.kwargs else None,
+            "status": response.status_code,
+            "ms": round(seconds * 1000, 3),
+            "trigger": trigger,
+            "at": at.isoformat(),
+        }
+        (folder / f"{name}.json").write_text(json.dumps(meta))
+        return name
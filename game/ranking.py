@@ -0,0 +1,157 @@
+# game/ranking.py
+"""Ranking: cache por (modo, página) invalidado por versão + paginação keyset.
+
+O ranking só muda em SubmitScoreView, que chama bump_ranking_version() após
+o commit. A versão (timestamp em µs) entra na chave do cache, no ETag e no
+Last-Modified, então versões antigas simplesmente deixam de ser lidas.
+Com LocMemCache cada processo tem sua versão; RANKING_CACHE_TTL limita
+quanto tempo outro worker pode servir um ranking antigo (use cache
+compartilhado — arquivo/redis — em produção com vários workers).
+"""
+import base64
+import binascii
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Score, PlayerBest
+
+VERSION_KEY = "ranking:version"
+
+
+def ranking_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = int(time.time() * 1_000_000)
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+async def aranking_version() -> int:
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        version = int(time.time() * 1_000_000)
+        if not await cache.aadd(VERSION_KEY, version, None):
+            version = await cache.aget(VERSION_KEY, version)
+    return version
+
+
+def bump_ranking_version():
+    cache.set(VERSION_KEY, max(int(time.time() * 1_000_000), ranking_version() + 1), None)
+
+
+def cached_ranking(kind: str, request, build):
+    """Devolve `build()` do cache para esta versão + querystring."""
+    key = f"ranking:{ranking_version()}:{kind}:{request.GET.urlencode()}"
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, getattr(settings, "RANKING_CACHE_TTL", 60))
+    return data
+
+
+async def acached_ranking(kind: str, request, abuild):
+    """cached_ranking para views async: `abuild` é uma corrotina."""
+    key = f"ranking:{await aranking_version()}:{kind}:{request.GET.urlencode()}"
+    data = await cache.aget(key)
+    if data is None:
+        data = await abuild()
+        await cache.aset(key, data, getattr(settings, "RANKING_CACHE_TTL", 60))
+    return data
+
+
+def version_etag(version: int, request) -> str:
+    return f"rk{version}-{request.GET.urlencode()}"
+
+
+def version_last_modified(version: int) -> datetime:
+    return datetime.fromtimestamp(version // 1_000_000, tz=timezone.utc)
+
+
+# para django.views.decorators.http.condition
+def ranking_etag(request, *args, **kwargs) -> str:
+    return version_etag(ranking_version(), request)
+
+
+def ranking_last_modified(request, *args, **kwargs) -> datetime:
+    return version_last_modified(ranking_version())
+
+
+# ---------------- paginação por cursor (keyset) ----------------
+
+RUNS_ORDER = ("points", "created_at", "id")   # Score
+BEST_ORDER = ("points", "last_at", "id")      # PlayerBest
+PK_TYPES = {RUNS_ORDER: uuid.UUID, BEST_ORDER: int}  # tipo do id no cursor de cada ordem
+
+
+def api_rows(mode: str, seed: str = None):
+    """(queryset de dicts, ordem) da API de ranking: mode "best" ou "runs".
+
+    Com `seed`, só as runs daquela seed (índice score_seed_rank_idx).
+    """
+    if mode == "best" and not seed:
+        return PlayerBest.objects.values("id","player_name","points","last_at"), BEST_ORDER
+    qs = Score.objects.filter(seed=seed) if seed else Score.objects.all()
+    return qs.values("id","player_name","points","created_at","run_id"), RUNS_ORDER
+
+
+def _value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def encode_cursor(row, fields) -> str:
+    points, at, pk = (_value(row, f) for f in fields)
+    raw = json.dumps([points, at.isoformat(), pk if isinstance(pk, int) else str(pk)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, fields=RUNS_ORDER):
+    """Cursor -> (points, datetime, id); ValueError se inválido (id com o tipo da ordem)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        points, at, pk = json.loads(raw)
+        if PK_TYPES[tuple(fields)] is int:
+            if type(pk) is not int:
+                raise ValueError(pk)
+        else:
+            pk = uuid.UUID(pk)
+        return int(points), datetime.fromisoformat(at), pk
+    except (TypeError, ValueError, AttributeError, binascii.Error) as e:
+        raise ValueError("cursor inválido") from e
+
+
+def keyset_page(qs, fields, cursor: str = None, limit: int = 50):
+    """Uma página ordenada por `fields` (todos desc) após `cursor`.
+
+    Usa só comparações sobre o índice composto, sem OFFSET nem COUNT(*):
+    toda página custa o mesmo. Devolve (linhas, próximo_cursor | None).
+    """
+    return _cut(list(_after(qs, fields, cursor)[:limit + 1]), fields, limit)
+
+
+async def akeyset_page(qs, fields, cursor: str = None, limit: int = 50):
+    """keyset_page com o ORM assíncrono."""
+    return _cut([row async for row in _after(qs, fields, cursor)[:limit + 1]], fields, limit)
+
+
+def _after(qs, fields, cursor):
+    qs = qs.order_by(*(f"-{f}" for f in fields))
+    if cursor:
+        points, at, pk = decode_cursor(cursor, fields)
+        a, b, c = fields
+        qs = qs.filter(Q(**{f"{a}__lt": points})
+                       | Q(**{a: points, f"{b}__lt": at})
+                       | Q(**{a: points, b: at, f"{c}__lt": pk}))
+    return qs
+
+
+def _cut(rows, fields, limit):
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1], fields)
+    return rows, None
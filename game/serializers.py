@@ -1,10 +1,39 @@
 from rest_framework import serializers
-from .models import Run, EventLog, Roll
+from .models import EventLog, Roll
+from .utils import card_dict, CARD_TYPE
 
-class RunSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Run
-        fields = "__all__"
+# ---------------- estado público (respostas das ações) ----------------
+# Sem a deck (ordem oculta) nem o histórico de descarte: só contagens.
+# Montado à mão a partir do GameState: é o caminho quente de cada jogada.
+
+PUBLIC_SCALARS = (
+    "seed", "max_hp", "hp", "turn", "emptied_this_turn", "status", "power",
+    "score_total", "equip_session", "combo_len", "session_points",
+    "descida_ate2", "final_scored",
+)
+
+def _slot(c, held):
+    return None if c is None else {"card": card_dict(c), "type": CARD_TYPE[c], "held": held}
+
+def public_state(state, run_id, version: int) -> dict:
+    data = {"id": str(run_id), "version": version}
+    for name in PUBLIC_SCALARS:
+        data[name] = getattr(state, name)
+    data["deck_count"] = len(state.deck)
+    data["discard_count"] = len(state.discard)
+    data["board"] = [_slot(c, h) for c, h in zip(state.board, state.held)]
+    return data
+
+def state_delta(old: dict, new: dict) -> dict:
+    """Só o que mudou entre dois public_state; board vira {"índice": slot}."""
+    out = {"id": new["id"], "version": new["version"], "since": old["version"], "delta": True}
+    for key, value in new.items():
+        if key != "board" and old.get(key) != value:
+            out[key] = value
+    slots = {str(i): slot for i, (prev, slot) in enumerate(zip(old["board"], new["board"])) if prev != slot}
+    if slots:
+        out["board"] = slots
+    return out
 
 class EventLogSerializer(serializers.ModelSerializer):
     class Meta:
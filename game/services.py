@@ -0,0 +1,296 @@
+# game/services.py
+"""Carregar/persistir runs event-sourced.
+
+O estado de uma run = snapshot gravado nos campos de `Run` (até a ação
+`snapshot_seq`) + as `RunAction` posteriores até `Run.version`,
+reaplicadas pelo motor. Cada jogada grava só as linhas novas de
+`RunAction` e avança `version` com um compare-and-swap
+(UPDATE ... WHERE id=? AND version=?); o snapshot vai no mesmo UPDATE a
+cada SNAPSHOT_EVERY ações e sempre que a run termina.
+
+Concorrência (settings.RUN_CONCURRENCY):
+  "lock"        select_for_update na leitura (padrão);
+  "optimistic"  leitura sem lock; o CAS detecta a corrida e levanta
+                VersionConflict para o chamador repetir ou recusar.
+
+Se faltarem linhas de RunAction entre o snapshot e `version`, o estado não
+tem como ser reconstruído: sai CorruptRunLog (não adianta repetir).
+"""
+import time
+from datetime import timedelta
+from typing import List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .engine import ACTIONS, ACTION_CODES, GameState, new_state, replay
+from .models import Run, RunAction, PlayerBest, EventLog, EventArchive
+from .verify import RunLog, check_log
+
+SNAPSHOT_EVERY = 16
+
+
+class VersionConflict(Exception):
+    """A run mudou entre a leitura e a escrita (versão diferente da esperada)."""
+
+
+class CorruptRunLog(Exception):
+    """O log de ações gravado não cobre a versão da run (linhas faltando)."""
+
+
+def optimistic() -> bool:
+    return getattr(settings, "RUN_CONCURRENCY", "lock") == "optimistic"
+
+
+class EventBuffer:
+    """Eventos de log acumulados durante uma requisição/transação.
+
+    Os helpers só fazem add()/extend(); tudo é gravado com um único
+    bulk_create em flush() — automaticamente ao sair do bloco `with` sem
+    erro (use dentro do atomic para gravar na mesma transação). Se o bloco
+    falhar, os eventos são descartados junto com o rollback.
+    """
+    def __init__(self):
+        self.rows: List[EventLog] = []
+
+    def add(self, run: Run, text: str):
+        self.rows.append(EventLog(run=run, text=text))
+
+    def extend(self, run: Run, texts):
+        self.rows.extend(EventLog(run=run, text=text) for text in texts)
+
+    def flush(self) -> int:
+        n = len(self.rows)
+        if n:
+            EventLog.objects.bulk_create(self.rows)
+            self.rows = []
+        return n
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.rows = []
+        return False
+
+
+def _pending_qs(run: Run, upto: int = None):
+    qs = run.actions.filter(seq__gt=run.snapshot_seq)
+    if upto is not None:
+        qs = qs.filter(seq__lte=upto)
+    return qs.order_by("seq").values_list("kind", "idx")
+
+
+def _check_log(run: Run, actions: list):
+    if len(actions) != run.version - run.snapshot_seq:
+        raise CorruptRunLog(f"log da run {run.pk} incompleto até a versão {run.version}")
+
+
+def pending_actions(run: Run, upto: int = None) -> list:
+    """Ações gravadas depois do snapshot da run (em ordem)."""
+    return [(ACTIONS[kind], idx) for kind, idx in _pending_qs(run, upto)]
+
+
+def load_state(run: Run) -> Tuple[GameState, int]:
+    """Estado na versão lida da run e essa versão (seq da última ação)."""
+    actions = pending_actions(run, upto=run.version)
+    _check_log(run, actions)
+    return replay(run.to_state(), actions), run.version
+
+
+async def aload_state(run: Run) -> Tuple[GameState, int]:
+    """load_state com o ORM assíncrono; o replay roda numa thread, fora do event loop."""
+    actions = [(ACTIONS[kind], idx) async for kind, idx in _pending_qs(run, upto=run.version)]
+    _check_log(run, actions)
+    return await sync_to_async(replay, thread_sensitive=False)(run.to_state(), actions), run.version
+
+
+def load_run(pk, lock: bool = None) -> Tuple[Run, GameState, int]:
+    """Lê a run para uma jogada; lock=None segue settings.RUN_CONCURRENCY."""
+    if lock is None:
+        lock = not optimistic()
+    qs = Run.objects.select_for_update() if lock else Run.objects
+    run = qs.get(pk=pk)
+    state, seq = load_state(run)
+    return run, state, seq
+
+
+def rebuild_state(run: Run, upto: int = None) -> GameState:
+    """Reconstrói do zero a partir da seed, sem usar o snapshot."""
+    if not run.replayable:
+        raise ValueError("run sem log de ações completo")
+    state, _ = new_state(run.seed, run.max_hp)
+    qs = run.actions.all() if upto is None else run.actions.filter(seq__lte=upto)
+    return replay(state, [(ACTIONS[kind], idx) for kind, idx in qs.order_by("seq").values_list("kind", "idx")])
+
+
+def run_log(run: Run) -> RunLog:
+    """A run com o log de ações completo, pronta para verify.check_log."""
+    actions = list(run.actions.order_by("seq").values_list("kind", "idx"))
+    return RunLog(run.pk, run.seed, run.max_hp, run.version, run.status, run.score_total, actions)
+
+
+def verify_run(run: Run):
+    """Motivo pelo qual o replay da run não confere, ou None (runs sem log passam)."""
+    if not run.replayable:
+        return None
+    return check_log(run_log(run))[1]
+
+
+def state_at(run: Run, version: int):
+    """Estado da run logo após a ação `version` (0 = início), ou None se indisponível."""
+    if not run.replayable or not 0 <= version <= run.version:
+        return None
+    return rebuild_state(run, upto=version)
+
+
+def save_actions(run: Run, state: GameState, seq: int, actions: List) -> int:
+    """CAS da versão (+ snapshot se devido) e anexa as ações ao log.
+
+    Deve rodar dentro de transaction.atomic. Levanta VersionConflict se a
+    run não está mais na versão `seq`. Devolve a nova versão; os campos de
+    `run` passam a refletir `state` em memória de qualquer forma.
+    """
+    new_seq = seq + len(actions)
+    updates = {"version": new_seq, "last_activity": timezone.now()}
+    run.load_state(state)
+    if state.status != "ongoing" or new_seq - run.snapshot_seq >= SNAPSHOT_EVERY:
+        updates["snapshot_seq"] = new_seq
+        updates.update((name, getattr(run, name)) for name in Run.STATE_FIELDS)
+    if not Run.objects.filter(pk=run.pk, version=seq).update(**updates):
+        raise VersionConflict(f"run {run.pk} não está mais na versão {seq}")
+    RunAction.objects.bulk_create([
+        RunAction(run=run, seq=seq + i, kind=ACTION_CODES[kind], idx=idx)
+        for i, (kind, idx) in enumerate(actions, start=1)
+    ])
+    for name, value in updates.items():
+        setattr(run, name, value)
+    return new_seq
+
+
+def update_player_best(player_name: str, points: int, at):
+    """Upsert em PlayerBest mantendo o máximo de pontos e o envio mais recente."""
+    updates = {"points": Greatest("points", points), "last_at": Greatest("last_at", at)}
+    if PlayerBest.objects.filter(player_name=player_name).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            PlayerBest.objects.create(player_name=player_name, points=points, last_at=at)
+    except IntegrityError:  # outro envio criou a linha antes
+        PlayerBest.objects.filter(player_name=player_name).update(**updates)
+
+
+# ---------------- log de eventos (linhas + arquivo compactado) ----------------
+
+def iter_run_events(run_id, after: int = 0, limit: int = None):
+    """Eventos da run com id > `after`, em ordem: (id, created_at, texto).
+
+    Junta o arquivo compactado (EventArchive) com as linhas ainda em
+    EventLog — quem lê não precisa saber se a run foi compactada. As
+    linhas vivas vêm por faixa no índice (run, id), em blocos.
+    """
+    if limit is not None and limit <= 0:
+        return
+    archive = EventArchive.objects.filter(run_id=run_id, last_id__gt=after).first()
+    for row in (archive.rows() if archive else ()):
+        if row[0] > after:
+            yield row
+            after = row[0]
+            if limit is not None:
+                limit -= 1
+                if not limit:
+                    return
+    live = EventLog.objects.filter(run_id=run_id, id__gt=after).order_by("id").values_list("id", "created_at", "text")
+    yield from (live[:limit] if limit is not None else live.iterator(chunk_size=500))
+
+
+def run_events(run_id, after: int = 0, limit: int = None) -> list:
+    return list(iter_run_events(run_id, after, limit))
+
+
+def compact_run_events(run_id, chunk_size: int = 500) -> int:
+    """Dobra as linhas de EventLog da run no EventArchive e apaga as linhas.
+
+    Roda numa transação; se a run já tem arquivo (ex. evento do envio de
+    score depois de compactar), as linhas novas são anexadas a ele.
+    Devolve quantas linhas foram arquivadas.
+    """
+    with transaction.atomic():
+        live = list(EventLog.objects.filter(run_id=run_id).order_by("id")
+                    .values_list("id", "created_at", "text"))
+        if not live:
+            return 0
+        archive = EventArchive.objects.select_for_update().filter(run_id=run_id).first()
+        rows = (archive.rows() if archive else []) + live
+        EventArchive.objects.update_or_create(run_id=run_id, defaults={
+            "data": EventArchive.pack(rows), "count": len(rows),
+            "last_id": live[-1][0], "compacted_at": timezone.now(),
+        })
+        ids = [row[0] for row in live]
+        for i in range(0, len(ids), chunk_size):
+            EventLog.objects.filter(id__in=ids[i:i + chunk_size]).delete()
+    return len(live)
+
+
+# ---------------- runs abandonadas ----------------
+
+def reap_idle_runs(idle: timedelta, batch_size: int = 200, max_batches: int = 0,
+                   archive: bool = False, pause: float = 0.0) -> int:
+    """Apaga (ou arquiva) runs "ongoing" sem jogada há mais de `idle`.
+
+    Varre pelo índice (status, last_activity) em lotes de `batch_size`,
+    cada lote na sua transação curta, com `pause` segundos entre lotes —
+    dá para rodar com tráfego. O DELETE repete o filtro de inatividade,
+    então uma run que voltou a ser jogada no meio do caminho fica. Apagar
+    leva junto ações, eventos e arquivo (CASCADE); Score fica com run=NULL.
+    archive=True mantém a linha: status "abandoned" + eventos compactados.
+    Devolve quantas runs foram removidas/arquivadas.
+    """
+    cutoff = timezone.now() - idle
+    idle_runs = Run.objects.filter(status="ongoing", last_activity__lt=cutoff)
+    total, batches, skipped = 0, 0, set()
+    while not max_batches or batches < max_batches:
+        ids = list(idle_runs.exclude(pk__in=skipped).order_by("last_activity")
+                   .values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            if archive:
+                done = [pk for pk in ids if _archive_run(pk, cutoff)]
+                skipped.update(set(ids) - set(done))
+                total += len(done)
+            else:
+                total += idle_runs.filter(pk__in=ids).delete()[1].get(Run._meta.label, 0)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return total
+
+
+def _archive_run(pk, cutoff) -> bool:
+    run = Run.objects.filter(pk=pk, status="ongoing", last_activity__lt=cutoff).first()
+    if run is None:
+        return False
+    try:
+        state, seq = load_state(run)
+    except CorruptRunLog:
+        return False  # fica "ongoing" para alguém olhar; o lote segue
+    # snapshot completo na versão atual: o replay de uma run "abandoned" falharia
+    state.status = "abandoned"
+    run.load_state(state)
+    updates = {name: getattr(run, name) for name in Run.STATE_FIELDS}
+    if not Run.objects.filter(pk=pk, version=seq, last_activity__lt=cutoff).update(snapshot_seq=seq, **updates):
+        return False
+    compact_run_events(pk)
+    return True
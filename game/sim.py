@@ -0,0 +1,137 @@
+# game/sim.py
+"""Simulação headless de runs inteiras (sem HTTP nem banco).
+
+Políticas recebem (state, legal, rng) e devolvem uma das ações legais.
+`simulate_chunk` roda um lote de seeds e devolve estatísticas agregadas
+(pensado para ser chamado em processos separados).
+"""
+import random
+from collections import Counter
+from typing import Callable, Dict, List
+
+from . import engine
+from .engine import GameState, Action, new_state, apply, legal_actions
+from .utils import CARD_POWER, CARD_TYPE
+
+MAX_STEPS = 2000  # proteção contra políticas que nunca terminam
+
+# parâmetros de balanceamento que podem ser sobrescritos na simulação
+TUNABLES = ("BOSS_BONUS", "COMBO_STEP", "MAX_TURNS_SPEED", "VICTORY_BONUS", "ENEMY_HOLD_LIMIT")
+
+Policy = Callable[[GameState, List[Action], random.Random], Action]
+
+# ---------------- políticas ----------------
+
+def random_policy(state: GameState, legal: List[Action], rng: random.Random) -> Action:
+    return rng.choice(legal)
+
+def greedy_policy(state: GameState, legal: List[Action], rng: random.Random) -> Action:
+    """Luta com o maior inimigo possível, cura se precisar, troca para arma melhor."""
+    best, best_key = None, None
+    for action in legal:
+        kind, idx = action
+        c = state.board[idx] if idx is not None else None
+        if kind == "fight":
+            key = (0, -CARD_POWER[c])
+        elif kind == "use_heal" and state.hp < state.max_hp:
+            key = (1, -CARD_POWER[c])
+        elif kind == "equip" and (CARD_POWER[c] > state.power or state.power <= 3):
+            key = (2, -CARD_POWER[c])
+        elif kind == "end_turn":
+            key = (3, 0)
+        elif kind == "discard":
+            key = (4, CARD_POWER[c])
+        elif kind == "equip":
+            key = (5, -CARD_POWER[c])
+        elif kind == "use_heal":
+            key = (6, 0)
+        else:  # pay_life: o inimigo mais fraco primeiro
+            key = (7, CARD_POWER[c])
+        if best_key is None or key < best_key:
+            best, best_key = action, key
+    return best
+
+def rush_policy(state: GameState, legal: List[Action], rng: random.Random) -> Action:
+    """Termina o turno assim que possível; fora isso, age como a greedy."""
+    if ("end_turn", None) in legal:
+        return ("end_turn", None)
+    return greedy_policy(state, legal, rng)
+
+POLICIES: Dict[str, Policy] = {
+    "greedy": greedy_policy,
+    "random": random_policy,
+    "rush": rush_policy,
+}
+
+# ---------------- simulação ----------------
+
+def simulate_run(seed: str, policy: Policy, max_hp: int = 20, rng: random.Random = None) -> dict:
+    """Joga uma run até o fim e devolve um resumo."""
+    rng = rng or random.Random(seed)
+    state, _ = new_state(seed, max_hp)
+    hold_hit = False
+    steps = 0
+    while state.status == "ongoing" and steps < MAX_STEPS:
+        legal = legal_actions(state)
+        if not legal:
+            break
+        apply(state, policy(state, legal, rng))
+        steps += 1
+        if not hold_hit:
+            hold_hit = any(h >= engine.ENEMY_HOLD_LIMIT and c is not None and CARD_TYPE[c] == "enemy"
+                           for c, h in zip(state.board, state.held))
+    return {
+        "status": state.status,
+        "score": state.score_total,
+        "turns": state.turn,
+        "hold_hit": hold_hit,
+        "speed_hit": state.turn >= engine.MAX_TURNS_SPEED,
+    }
+
+def apply_overrides(overrides: Dict[str, float]):
+    """Sobrescreve constantes do motor (só neste processo)."""
+    for name, value in (overrides or {}).items():
+        if name not in TUNABLES:
+            raise ValueError(f"parâmetro não ajustável: {name}")
+        setattr(engine, name, value)
+
+def simulate_chunk(seeds: List[str], policy_name: str, max_hp: int = 20, overrides: Dict[str, float] = None) -> dict:
+    """Roda um lote de seeds e agrega: contadores e distribuições (Counter)."""
+    apply_overrides(overrides)
+    policy = POLICIES[policy_name]
+    agg = {"runs": 0, "status": Counter(), "scores": Counter(), "turns": Counter(),
+           "hold_hit": 0, "speed_hit": 0}
+    for seed in seeds:
+        r = simulate_run(seed, policy, max_hp)
+        agg["runs"] += 1
+        agg["status"][r["status"]] += 1
+        agg["scores"][r["score"]] += 1
+        if r["status"] != "ongoing":
+            agg["turns"][r["turns"]] += 1
+        agg["hold_hit"] += r["hold_hit"]
+        agg["speed_hit"] += r["speed_hit"]
+    return agg
+
+def merge(total: dict, part: dict) -> dict:
+    if not total:
+        return part
+    for key, value in part.items():
+        total[key] += value
+    return total
+
+def percentile(counts: Counter, q: float):
+    """Percentil (0..100) de uma distribuição guardada como Counter."""
+    n = sum(counts.values())
+    if not n:
+        return None
+    target = q / 100 * (n - 1)
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen > target:
+            return value
+    return max(counts)
+
+def mean(counts: Counter):
+    n = sum(counts.values())
+    return sum(v * k for v, k in counts.items()) / n if n else None
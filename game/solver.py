@@ -0,0 +1,110 @@
+# game/solver.py
+"""Score máximo alcançável por seed (par), sem Django.
+
+Busca exaustiva sobre o motor (mesmas regras de apply) com uma tabela de
+transposição. A chave compacta de um estado é (cartas restantes na deck,
+multiconjunto da mesa com os contadores held): dado o deck da seed, isso
+fixa quais cartas ainda podem aparecer. Para cada chave guardamos a
+fronteira de Pareto de
+
+    (score, hp, power, combo, session_points, descida pendente, -turno, esvaziados)
+
+Todos esses componentes são monótonos (mais nunca piora o que se pode
+alcançar), então um estado dominado por outro já visto na mesma chave é
+podado. Os estados são expandidos em ordem decrescente de
+5*len(deck) + cartas na mesa, que cai a cada ação — assim a fronteira de
+uma chave está completa antes de ela ser expandida.
+"""
+import heapq
+from operator import le
+from typing import List, NamedTuple, Optional
+
+from .engine import GameState, Action, new_state, apply, legal_actions, MAX_TURNS_SPEED
+from .utils import CARD_TYPE
+
+
+class Solution(NamedTuple):
+    score: int              # melhor score final encontrado
+    actions: List[Action]   # sequência que alcança `score`
+    exact: bool             # False se o limite de nós cortou a busca (score é só cota inferior)
+    nodes: int              # estados expandidos
+
+
+def _key(s: GameState):
+    return (len(s.deck), tuple(sorted((c, h) for c, h in zip(s.board, s.held) if c is not None)))
+
+def _vector(s: GameState):
+    # session_points só importa enquanto a dobra de "descida até 2" está pendente
+    return (s.score_total, s.hp, s.power, s.combo_len,
+            0 if s.descida_ate2 else s.session_points, not s.descida_ate2,
+            -min(s.turn, MAX_TURNS_SPEED), min(s.emptied_this_turn, 2))
+
+def _potential(s: GameState) -> int:
+    return 5 * len(s.deck) + sum(c is not None for c in s.board)
+
+def _useful(s: GameState, action: Action) -> bool:
+    # descartar cura nunca é melhor que usá-la (hp só sobe; o slot esvazia igual)
+    return not (action[0] == "discard" and CARD_TYPE[s.board[action[1]]] == "heal")
+
+def _path(node) -> List[Action]:
+    out = []
+    while node is not None:
+        node, action = node
+        out.append(action)
+    out.reverse()
+    return out
+
+def solve(seed: str, max_hp: int = 20, node_limit: Optional[int] = None,
+          start: Optional[GameState] = None) -> Solution:
+    """Melhor score a partir do início da seed (ou de `start`, ex. um fim de jogo)."""
+    if start is None:
+        start, _ = new_state(seed, max_hp)
+    table = {}     # chave -> fronteira [vetor, ...]
+    buckets = {}   # potencial -> [(chave, vetor, estado, nó do caminho)]
+    heap = []
+    best, best_node, nodes = -1, None, 0
+
+    def push(state, node):
+        key, vec = _key(state), _vector(state)
+        front = table.get(key)
+        if front is None:
+            table[key] = [vec]
+        else:
+            for other in front:
+                if all(map(le, vec, other)):
+                    return
+            front[:] = [other for other in front if not all(map(le, other, vec))]
+            front.append(vec)
+        p = _potential(state)
+        bucket = buckets.get(p)
+        if bucket is None:
+            buckets[p] = bucket = []
+            heapq.heappush(heap, -p)
+        bucket.append((key, vec, state, node))
+
+    push(start, None)
+    exact = True
+    while heap:
+        if node_limit is not None and nodes >= node_limit:
+            exact = False
+            break
+        for key, vec, state, node in buckets.pop(-heapq.heappop(heap)):
+            if vec not in table[key]:
+                continue  # dominado depois de enfileirado
+            nodes += 1
+            for action in legal_actions(state):
+                if not _useful(state, action):
+                    continue
+                child = apply(state.copy(), action)[0]
+                child_node = (node, action)
+                if child.status != "ongoing":
+                    if child.score_total > best:
+                        best, best_node = child.score_total, child_node
+                    continue
+                push(child, child_node)
+    return Solution(max(best, 0), _path(best_node), exact, nodes)
+
+def solve_task(task):
+    """(seed, max_hp, node_limit) -> (seed, max_hp, Solution); para ProcessPoolExecutor."""
+    seed, max_hp, node_limit = task
+    return seed, max_hp, solve(seed, max_hp, node_limit)
@@ -1,3 +1,159 @@
-from django.test import TestCase
+# game/tests.py
+"""Benchmarks: micro (regras/utils) e ponta a ponta (API pelo test client).
 
-# Create your tests here.
+    USE_SQLITE=1 python manage.py test game                 # só mede
+    BENCH_STRICT=1 USE_SQLITE=1 python manage.py test game  # compara com o baseline
+    BENCH_UPDATE=1 USE_SQLITE=1 python manage.py test game  # regrava o baseline
+
+Os tempos vão para game/bench_baseline.json; com BENCH_STRICT=1, uma
+medida acima de baseline × BENCH_TOLERANCE (padrão 3) falha o teste — sem
+ele os tempos não reprovam nada, já que máquinas (e CI) variam. As
+contagens de queries por endpoint são sempre exatas (EXPECTED_QUERIES).
+Os testes funcionais ficam em game/tests_api.py.
+"""
+import json
+import os
+import random
+import timeit
+from collections import defaultdict
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from . import engine
+from .engine import new_state, apply, legal_actions
+from .sim import greedy_policy, simulate_run
+from .utils import new_deck, new_deck_codes, classify_card, rank_power, card_dict, Rank
+
+BASELINE = Path(__file__).with_name("bench_baseline.json")
+TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "3"))
+UPDATE = os.getenv("BENCH_UPDATE") == "1"
+STRICT = os.getenv("BENCH_STRICT") == "1"
+
+# queries por chamada (test client dentro de TestCase: atomic vira SAVEPOINT/RELEASE)
+EXPECTED_QUERIES = {
+    "start": 4,        # SAVEPOINT, INSERT run, INSERT eventlog, RELEASE
+    "action": 7,       # SAVEPOINT, SELECT run, SELECT log, UPDATE (CAS), INSERT ação, INSERT eventos, RELEASE
+    "state": 2,        # SELECT run, SELECT log
+    "score": 13,       # SELECT run, SELECT log (replay), get_or_create de Score e upsert de PlayerBest
+                       # (com savepoints), INSERT evento
+    "ranking": 1,      # cache frio; com cache quente, 0
+}
+
+_baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+_results = defaultdict(dict)
+
+
+def tearDownModule():
+    if UPDATE:
+        merged = {**_baseline, **_results}
+        BASELINE.write_text(json.dumps(merged, indent=2, sort_keys=True) + "\n")
+
+
+class BenchMixin:
+    def record(self, section: str, name: str, value: float):
+        """Guarda a medida e, com BENCH_STRICT, compara com o baseline (se houver)."""
+        value = round(value, 3)
+        _results[section][name] = value
+        base = _baseline.get(section, {}).get(name)
+        if base is not None and STRICT and not UPDATE:
+            self.assertLessEqual(value, base * TOLERANCE,
+                                 f"{section}/{name}: {value} vs baseline {base} (×{TOLERANCE})")
+
+
+def _per_call_us(stmt, number=2000, repeat=5) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e6
+
+
+class MicroBenchmarks(BenchMixin, SimpleTestCase):
+    """Tempo por chamada (µs, melhor de 5 repetições)."""
+
+    def test_new_deck(self):
+        self.record("micro_us", "new_deck", _per_call_us(lambda: new_deck("bench"), number=500))
+        self.record("micro_us", "new_deck_codes", _per_call_us(lambda: new_deck_codes("bench"), number=500))
+
+    def test_classify_card(self):
+        cards = [card_dict(c) for c in range(52)]
+        self.record("micro_us", "classify_card_x52", _per_call_us(lambda: [classify_card(c) for c in cards]))
+        self.record("micro_us", "classify_code_x52", _per_call_us(lambda: [classify_card(c) for c in range(52)]))
+
+    def test_rank_power(self):
+        ranks = list(Rank)
+        self.record("micro_us", "rank_power_x13", _per_call_us(lambda: [rank_power(r) for r in ranks]))
+
+    def test_scoring(self):
+        base, _ = new_state("bench")
+
+        def kills():
+            state, events = base.copy(), []
+            for val in (14, 9, 5, 2):
+                engine._score_kill(state, val, events)
+        self.record("micro_us", "score_kill_x4", _per_call_us(kills))
+
+    def test_refill_board(self):
+        base, _ = new_state("bench")
+        base.board = [None] * engine.BOARD_SLOTS
+
+        def refill():
+            engine._refill_board(base.copy(), [])
+        self.record("micro_us", "refill_board", _per_call_us(refill))
+
+    def test_full_run(self):
+        self.record("micro_us", "simulate_run_greedy",
+                    _per_call_us(lambda: simulate_run("bench", greedy_policy), number=50))
+
+
+@override_settings(RUN_CONCURRENCY="lock", RUN_HOT_CACHE=False, ASYNC_API=False)
+class ApiBenchmarks(BenchMixin, TestCase):
+    """Run roteirizada pela API: /api/start -> jogadas -> end_turn ... -> /score."""
+
+    SEED = "bench"
+
+    def setUp(self):
+        cache.clear()
+        self.timings = defaultdict(list)
+        self.queries = defaultdict(set)
+
+    def call(self, name, method, path, body=None):
+        with CaptureQueriesContext(connection) as ctx:
+            start = timeit.default_timer()
+            if method == "post":
+                response = self.client.post(path, body or {}, content_type="application/json")
+            else:
+                response = self.client.get(path)
+            self.timings[name].append(timeit.default_timer() - start)
+        self.queries[name].add(len(ctx.captured_queries))
+        self.assertLess(response.status_code, 400, response.content)
+        return response
+
+    def play_run(self):
+        """Joga uma run inteira com a política greedy (espelhada no motor local)."""
+        data = self.call("start", "post", "/api/start", {"seed": self.SEED}).json()
+        rid, (local, _) = data["id"], new_state(self.SEED)
+        rng = random.Random(self.SEED)
+        while local.status == "ongoing":
+            kind, idx = greedy_policy(local, legal_actions(local), rng)
+            apply(local, (kind, idx))
+            path = f"/api/run/{rid}/{kind}" + ("" if idx is None else f"/{idx}")
+            data = self.call("action", "post", path).json()
+        self.assertEqual(data["score_total"], local.score_total)
+        self.assertEqual(self.call("state", "get", f"/api/run/{rid}").json()["version"], data["version"])
+        self.call("score", "post", f"/api/run/{rid}/score", {"player_name": "bench"})
+        self.call("ranking", "get", "/api/ranking")
+        return data["version"]
+
+    def test_scripted_run(self):
+        start = timeit.default_timer()
+        moves = self.play_run()
+        elapsed = timeit.default_timer() - start
+
+        for name, expected in EXPECTED_QUERIES.items():
+            self.assertEqual(self.queries[name], {expected}, f"queries em {name}")
+            _results["queries"][name] = expected
+        self.record("api_ms", "full_run", elapsed * 1000)
+        self.record("api_ms", "per_move", elapsed * 1000 / moves)
+        for name, samples in self.timings.items():
+            self.record("api_ms", name, sum(samples) / len(samples) * 1000)
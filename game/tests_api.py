@@ -0,0 +1,974 @@
+# game/tests_api.py
+"""Testes funcionais: API HTTP/async/WebSocket, serviços e comandos.
+
+    USE_SQLITE=1 python manage.py test game
+
+Os benchmarks (tempos e contagem de queries) ficam em game/tests.py.
+"""
+import base64
+import io
+import json
+import random
+import uuid
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from backend import urls as backend_urls
+
+from . import engine, hotruns, live, metrics, services, views_async
+from .challenge import daily_seed
+from .engine import new_state, apply, legal_actions
+from .hints import MAX_DEPTH, best_move
+from .models import EventLog, PlayerBest, Run, RunAction, Score, SeedPar
+from .play import MAX_BATCH_ACTIONS, current_state, play_actions, start_run
+from .profiling import _trigger
+from .ranking import api_rows, bump_ranking_version
+from .sim import greedy_policy, simulate_run
+from .solver import solve
+from .tests import EXPECTED_QUERIES
+from .views import CORRUPT_LOG_DETAIL
+
+
+@override_settings(EXPORT_TOKEN="tk")
+class ExportTests(TestCase):
+    def test_scores_by_seed(self):
+        for i, seed in enumerate(("a", "b", "a")):
+            run = Run.objects.create(seed=seed, status="won")
+            Score.objects.create(run=run, seed=seed, player_name=f"p{i}", points=i)
+        response = self.client.get("/api/export/scores?format=ndjson&seed=a", HTTP_AUTHORIZATION="Bearer tk")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(sorted(r["player_name"] for r in rows), ["p0", "p2"])
+        self.assertEqual({(r["seed"], r["status"]) for r in rows}, {("a", "won")})
+
+    def test_bad_token_is_403(self):
+        for auth in ("Bearer errado", "Bearer çãé"):
+            self.assertEqual(self.client.get("/api/export/runs", HTTP_AUTHORIZATION=auth).status_code, 403)
+
+
+def _cursor(points, at, pk) -> str:
+    return base64.urlsafe_b64encode(json.dumps([points, at, pk]).encode()).decode().rstrip("=")
+
+
+class RankingCursorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            Score.objects.create(player_name=f"p{i}", points=i)
+            PlayerBest.objects.create(player_name=f"p{i}", points=i)
+
+    def test_forged_id_is_400(self):
+        at = "2026-01-01T00:00:00+00:00"
+        for path, pk in (("/api/ranking?mode=runs", 1), ("/api/ranking?mode=runs", "x"),
+                         ("/api/ranking?mode=best", "x"), ("/api/ranking?mode=best", True),
+                         ("/ranking/?mode=runs", "x"), ("/ranking/?mode=best", "x")):
+            response = self.client.get(f"{path}&cursor={_cursor(1, at, pk)}")
+            self.assertEqual(response.status_code, 400, (path, pk))
+
+    def test_next_cursor_pages(self):
+        for mode in ("runs", "best"):
+            first = self.client.get(f"/api/ranking?mode={mode}&limit=2")
+            self.assertEqual([r["points"] for r in first.json()], [2, 1])
+            rest = self.client.get(f"/api/ranking?mode={mode}&limit=2&cursor={first['X-Next-Cursor']}")
+            self.assertEqual([r["points"] for r in rest.json()], [0])
+
+
+@override_settings(PROFILE_TOKEN="segredo", PROFILE_SAMPLE_RATE=0.0)
+class ProfileTriggerTests(SimpleTestCase):
+    def test_non_ascii_flag_is_not_a_trigger(self):
+        factory = RequestFactory()
+        self.assertIsNone(_trigger(factory.get("/", {"_profile": "sêgredo"})))
+        self.assertIsNone(_trigger(factory.get("/", HTTP_X_PROFILE="ção")))
+        self.assertEqual(_trigger(factory.get("/", {"_profile": "segredo"})), "token")
+
+
+def _brute_force(state) -> int:
+    """Melhor score final por busca exaustiva, sem poda (só para estados pequenos)."""
+    if state.status != "ongoing":
+        return state.score_total
+    return max(_brute_force(apply(state.copy(), a)[0]) for a in legal_actions(state))
+
+
+class SolverTests(SimpleTestCase):
+    def test_path_reaches_score(self):
+        for seed, max_hp in (("bench", 5), ("a", 3), ("b", 6)):
+            sol = solve(seed, max_hp)
+            state, _ = new_state(seed, max_hp)
+            for action in sol.actions:
+                apply(state, action)
+            self.assertTrue(sol.exact)
+            self.assertNotEqual(state.status, "ongoing")
+            self.assertEqual(state.score_total, sol.score, seed)
+
+    def test_matches_exhaustive_search_on_endgame(self):
+        for seed in ("bench", "a", "b"):
+            start, _ = new_state(seed, 20)
+            start.deck = start.deck[-4:]  # 4 na mesa + 4 na deck
+            sol = solve(seed, start=start)
+            self.assertEqual(sol.score, _brute_force(start), seed)
+            state = start.copy()
+            for action in sol.actions:
+                apply(state, action)
+            self.assertEqual(state.score_total, sol.score)
+
+
+class SolveSeedsCommandTests(TestCase):
+    def test_flags_score_above_par(self):
+        par = solve("bench", 5).score
+        run = Run.objects.create(seed="bench", max_hp=5, status="won")
+        Score.objects.create(run=run, seed="bench", player_name="honesto", points=par)
+        Score.objects.create(run=run, seed="bench", player_name="trapaça", points=par + 1)
+        out = io.StringIO()
+        call_command("solve_seeds", "--from-scores", "--save", stdout=out)
+        self.assertIn(f"trapaça — {par + 1} pts", out.getvalue())
+        self.assertNotIn("honesto", out.getvalue())
+        self.assertIn("1 envio(s) suspeito(s)", out.getvalue())
+        self.assertTrue(SeedPar.objects.filter(seed="bench", max_hp=5, par=par, exact=True).exists())
+
+    def test_scores_without_run_and_worker_pool(self):
+        par = solve("bench", 5).score
+        Score.objects.create(run=None, seed="bench", player_name="órfão", points=par + 1)  # run apagada
+        Score.objects.create(run=None, seed="bench", player_name="ok", points=par)
+        out = io.StringIO()
+        call_command("solve_seeds", "--from-scores", "--max-hp", "5", "--workers", "2", stdout=out)
+        self.assertIn("'bench' hp=5", out.getvalue())
+        self.assertIn(f"órfão — {par + 1} pts", out.getvalue())
+        self.assertIn("1 envio(s) suspeito(s)", out.getvalue())
+
+    def test_pool_closed_on_error(self):
+        with mock.patch("game.management.commands.solve_seeds.ProcessPoolExecutor") as pool_cls, \
+                mock.patch.object(SeedPar.objects, "update_or_create", side_effect=RuntimeError):
+            pool = pool_cls.return_value.__enter__.return_value
+            pool.map.side_effect = lambda func, tasks: map(func, tasks)
+            with self.assertRaises(RuntimeError):
+                call_command("solve_seeds", "bench", "--max-hp", "5", "--workers", "2", "--save", stdout=io.StringIO())
+        pool_cls.return_value.__exit__.assert_called_once()
+
+
+def _slot_actions(state) -> list:
+    return [a for a in legal_actions(state) if a[1] is not None]
+
+
+@override_settings(RUN_HOT_CACHE=False, ASYNC_API=False)
+class CasTests(TestCase):
+    """Versão velha na leitura: o CAS recusa, play_actions repete, e esgotado vira 409."""
+
+    def race(self, concurrency, stale_reads, retries):
+        with override_settings(RUN_CONCURRENCY=concurrency, RUN_CAS_RETRIES=retries):
+            rid = self.client.post("/api/start", {"seed": "cas"}, content_type="application/json").json()["id"]
+            stale_state = services.load_run(rid)[1]
+            theirs, *rest = _slot_actions(stale_state)
+            mine = next(a for a in rest if a[1] != theirs[1])
+            play_actions(rid, [theirs])  # a outra requisição grava a versão 1
+
+            reads = []
+            def load_run(pk, lock=None):
+                reads.append(pk)
+                if len(reads) <= stale_reads:  # leitura de antes da outra escrita
+                    return Run.objects.get(pk=pk), stale_state.copy(), 0
+                return services.load_run(pk, lock)
+
+            with mock.patch("game.play.load_run", side_effect=load_run):
+                response = self.client.post(f"/api/run/{rid}/{mine[0]}/{mine[1]}")
+            return rid, response, len(reads)
+
+    def assertLog(self, rid, version):
+        self.assertEqual(Run.objects.get(pk=rid).version, version)
+        self.assertEqual(list(RunAction.objects.filter(run_id=rid).values_list("seq", flat=True)),
+                         list(range(1, version + 1)))
+
+    def test_retry_after_conflict(self):
+        for concurrency in ("lock", "optimistic"):
+            rid, response, reads = self.race(concurrency, stale_reads=1, retries=2)
+            self.assertEqual(response.status_code, 200, concurrency)
+            self.assertEqual(response.json()["version"], 2)
+            self.assertEqual(reads, 2)
+            self.assertLog(rid, 2)
+
+    def test_409_when_retries_run_out(self):
+        for concurrency in ("lock", "optimistic"):
+            rid, response, reads = self.race(concurrency, stale_reads=99, retries=2)
+            self.assertEqual(response.status_code, 409, concurrency)
+            self.assertEqual(reads, 3)
+            self.assertLog(rid, 1)  # só a ação da outra requisição; nada órfão desta
+
+
+@override_settings(RUN_HOT_CACHE=True, RUN_HOT_CACHE_SIZE=100, RUN_HOT_CACHE_TTL=300,
+                   RUN_HOT_FLUSH_SECONDS=3600, RUN_HOT_SHARED=False, RUN_CAS_RETRIES=2)
+class HotRunTests(TestCase):
+    """Cache write-behind: na seed "hot" a mesa começa com armas nos slots 0..2."""
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(hotruns, "hot_runs", hotruns.HotRunCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start(self, seed="hot"):
+        return start_run(seed, 20)[0].pk
+
+    def durable(self, rid):
+        run = Run.objects.get(pk=rid)
+        self.assertEqual(RunAction.objects.filter(run=run).count(), run.version)
+        return run.version
+
+    def test_checkpoint_on_end_turn(self):
+        rid = self.start()
+        for n, action in enumerate((("discard", 0), ("discard", 1), ("discard", 2)), 1):
+            self.assertEqual(play_actions(rid, [action]).version, n)
+            self.assertEqual(self.durable(rid), 0)  # só em memória
+        self.assertEqual(current_state(rid)[2], 3)
+        events = EventLog.objects.filter(run_id=rid).count()
+        self.assertEqual(play_actions(rid, [("end_turn", None)]).version, 4)
+        self.assertEqual(self.durable(rid), 4)
+        self.assertGreater(EventLog.objects.filter(run_id=rid).count(), events)
+        self.assertEqual(hotruns.hot_runs.peek(rid).pending, [])
+
+    def test_checkpoint_on_finish(self):
+        rid, rng = self.start("a"), random.Random(1)
+        state = current_state(rid)[1]
+        while state.status == "ongoing":
+            action = greedy_policy(state, legal_actions(state), rng)
+            played = play_actions(rid, [action])
+            state = played.state
+        run = Run.objects.get(pk=rid)
+        self.assertEqual((run.status, run.score_total), (state.status, state.score_total))
+        self.assertEqual(self.durable(rid), played.version)
+
+    def test_eviction_by_ttl_and_size(self):
+        rid = self.start()
+        play_actions(rid, [("discard", 0)])
+        hotruns.hot_runs.peek(rid).touched -= 301  # inativa além do TTL
+        play_actions(self.start(), [("discard", 0)])  # qualquer acesso varre o LRU
+        self.assertIsNone(hotruns.hot_runs.peek(rid))
+        self.assertEqual(self.durable(rid), 1)
+
+        with override_settings(RUN_HOT_CACHE_SIZE=1):
+            other = self.start()
+            play_actions(other, [("discard", 1)])
+            play_actions(self.start(), [("discard", 0)])
+            self.assertIsNone(hotruns.hot_runs.peek(other))
+            self.assertEqual(self.durable(other), 1)
+
+    def test_idle_run_is_not_evicted_by_its_own_access(self):
+        rid = self.start()
+        play_actions(rid, [("discard", 0)])
+        hotruns.hot_runs.peek(rid).touched -= 301
+        self.assertEqual(current_state(rid)[2], 1)
+        self.assertEqual(self.client.get(f"/api/run/{rid}").status_code, 200)
+        self.assertEqual(self.client.get(f"/api/run/{rid}/moves").status_code, 200)
+        with override_settings(RUN_CAS_RETRIES=0):
+            self.assertEqual(self.client.post(f"/api/run/{rid}/discard/1").status_code, 200)
+        self.assertIsNotNone(hotruns.hot_runs.peek(rid))
+
+    def test_idle_dirty_run_flushed_by_other_traffic(self):
+        rid = self.start()
+        play_actions(rid, [("discard", 0)])
+        hotruns.hot_runs.peek(rid).dirty_since -= 3601
+        current_state(self.start())
+        self.assertEqual(self.durable(rid), 1)
+        self.assertEqual(hotruns.hot_runs.peek(rid).pending, [])  # gravada, mas continua no cache
+
+    def test_entry_evicted_while_waiting_is_reloaded(self):
+        rid = self.start()
+        play_actions(rid, [("discard", 0)])
+        cache_ = hotruns.hot_runs
+        evict = cache_._evict
+        def evict_once(skip=None):  # outra thread despeja a entrada antes do lock
+            cache_.entries.pop(skip, None)
+            cache_._evict = evict
+        cache_._evict = evict_once
+        run, state, version = current_state(rid)
+        self.assertEqual((version, state.board[0]), (1, None))
+        self.assertEqual(self.durable(rid), 1)
+
+    def test_shared_tail_recovery(self):
+        rid = self.start()
+        with override_settings(RUN_HOT_SHARED=True):
+            expected = play_actions(rid, [("discard", 0), ("discard", 1)], batch=True).state
+            with mock.patch.object(hotruns, "hot_runs", hotruns.HotRunCache()):  # "crash": memória perdida
+                run, state, version = current_state(rid)
+                self.assertEqual(version, 2)
+                self.assertEqual((state.board, state.hp, bytes(state.deck)),
+                                 (expected.board, expected.hp, bytes(expected.deck)))
+                self.assertEqual(self.durable(rid), 0)
+                play_actions(rid, [("discard", 2)])
+                self.assertEqual(play_actions(rid, [("end_turn", None)]).version, 4)
+                self.assertEqual(self.durable(rid), 4)
+        with mock.patch.object(hotruns, "hot_runs", hotruns.HotRunCache()):
+            self.assertEqual(current_state(rid)[2], 4)
+
+    def test_without_shared_tail_crash_loses_only_pending(self):
+        rid = self.start()
+        play_actions(rid, [("discard", 0)])
+        with mock.patch.object(hotruns, "hot_runs", hotruns.HotRunCache()):
+            self.assertEqual(current_state(rid)[2], 0)
+
+    @override_settings(RUN_HOT_FLUSH_SECONDS=0)  # toda jogada vira checkpoint
+    def test_version_conflict_discards_entry(self):
+        rid = self.start()
+        play_actions(rid, [("discard", 0)])
+        with override_settings(RUN_HOT_CACHE=False):  # outro processo grava a run
+            play_actions(rid, [("discard", 1)])
+        played = play_actions(rid, [("discard", 2)])  # CAS falha, entrada descartada, repete do banco
+        self.assertEqual(played.version, 3)
+        self.assertEqual(played.state.board[:3], [None, None, None])
+        self.assertEqual(self.durable(rid), 3)
+
+        with override_settings(RUN_HOT_CACHE=False):
+            play_actions(rid, [("end_turn", None)])
+        with override_settings(RUN_CAS_RETRIES=0):
+            slot = next(a for a in _slot_actions(played.state) if a[0] != "fight")
+            self.assertEqual(self.client.post(f"/api/run/{rid}/{slot[0]}/{slot[1]}").status_code, 409)
+        self.assertIsNone(hotruns.hot_runs.peek(rid))
+        self.assertEqual(self.durable(rid), 4)
+
+
+def _play_out(rid, rng) -> Run:
+    """Joga a run até o fim (greedy) e devolve a Run gravada."""
+    state = current_state(rid)[1]
+    while state.status == "ongoing":
+        state = play_actions(rid, [greedy_policy(state, legal_actions(state), rng)]).state
+    return Run.objects.get(pk=rid)
+
+
+@override_settings(RUN_HOT_CACHE=False, ASYNC_API=False, SCORE_VERIFY=True)
+class ScoreVerifyTests(TestCase):
+    """Run adulterada no banco: o envio ao ranking recusa e audit_scores aponta."""
+
+    def setUp(self):
+        self.run = _play_out(start_run("a", 20)[0].pk, random.Random(3))
+
+    def submit(self):
+        return self.client.post(f"/api/run/{self.run.pk}/score", {"player_name": "p"},
+                                content_type="application/json")
+
+    def audit(self):
+        Score.objects.get_or_create(run=self.run, player_name="p",
+                                    defaults={"seed": self.run.seed, "points": self.run.score_total})
+        out = io.StringIO()
+        call_command("audit_scores", stdout=out)
+        return out.getvalue()
+
+    def tamper(self, **fields):
+        Run.objects.filter(pk=self.run.pk).update(**fields)
+        self.run.refresh_from_db()
+
+    def test_honest_run_passes(self):
+        self.assertEqual(self.submit().status_code, 200)
+        self.assertIn("0 divergente(s)", self.audit())
+
+    def test_tampered_score(self):
+        self.tamper(score_total=self.run.score_total + 5)
+        response = self.submit()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pts, run gravada", response.json()["detail"])
+        self.assertIn("1 divergente(s)", self.audit())
+
+    def test_tampered_status(self):
+        self.tamper(status="won" if self.run.status == "lost" else "lost")
+        response = self.submit()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("replay termina", response.json()["detail"])
+        self.assertIn("1 divergente(s)", self.audit())
+
+    def test_truncated_log(self):
+        RunAction.objects.filter(run=self.run, seq=self.run.version).delete()
+        response = self.submit()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("log incompleto", response.json()["detail"])
+        self.assertFalse(Score.objects.exists())
+        output = self.audit()
+        self.assertIn("log incompleto", output)
+        self.assertIn("1 divergente(s)", output)
+
+
+class EventArchiveTests(TestCase):
+    """Leitura de eventos igual antes e depois de compactar, com linhas novas depois."""
+
+    def setUp(self):
+        self.run = Run.objects.create(seed="ev", status="won")
+        self.ids = [EventLog.objects.create(run=self.run, text=f"e{i}").id for i in range(5)]
+        self.before = services.run_events(self.run.pk)
+        self.assertEqual(services.compact_run_events(self.run.pk, chunk_size=2), 5)
+        self.ids.append(EventLog.objects.create(run=self.run, text="e5").id)  # ex.: envio de score
+
+    def read(self, after=0, limit=None):
+        return [(row[0], row[2]) for row in services.run_events(self.run.pk, after, limit)]
+
+    def test_archive_then_live(self):
+        self.assertEqual(EventLog.objects.filter(run=self.run).count(), 1)
+        self.assertEqual([r[0] for r in self.before], self.ids[:5])
+        self.assertEqual(self.read(), [(pk, f"e{i}") for i, pk in enumerate(self.ids)])
+
+    def test_after_and_limit(self):
+        ids = self.ids
+        self.assertEqual([r[0] for r in self.read(after=ids[1])], ids[2:])
+        self.assertEqual([r[0] for r in self.read(after=ids[4])], ids[5:])  # só a linha viva
+        self.assertEqual(self.read(after=ids[5]), [])
+        self.assertEqual([r[0] for r in self.read(limit=2)], ids[:2])
+        self.assertEqual([r[0] for r in self.read(after=ids[3], limit=2)], ids[4:6])  # cruza a fronteira
+        self.assertEqual([r[0] for r in self.read(after=ids[0], limit=4)], ids[1:5])  # acaba no arquivo
+        self.assertEqual(self.read(limit=0), [])
+
+    def test_second_compaction_appends(self):
+        self.assertEqual(services.compact_run_events(self.run.pk), 1)
+        self.assertFalse(EventLog.objects.filter(run=self.run).exists())
+        self.assertEqual([r[0] for r in self.read()], self.ids)
+        self.assertEqual([r[0] for r in self.read(after=self.ids[2], limit=2)], self.ids[3:5])
+
+
+@override_settings(RUN_HOT_CACHE=False, ASYNC_API=False)
+class ReapRunsTests(TestCase):
+    """Runs "ongoing" paradas há mais de `idle`: apagadas ou arquivadas como "abandoned"."""
+
+    def setUp(self):
+        self.idle, self.fresh = [], start_run("reap", 20)[0].pk
+        for _ in range(3):
+            rid = start_run("reap", 20)[0].pk
+            play_actions(rid, [_slot_actions(current_state(rid)[1])[0]])
+            self.idle.append(rid)
+        Run.objects.filter(pk__in=self.idle).update(last_activity=timezone.now() - timedelta(days=2))
+        Score.objects.create(run_id=self.idle[0], seed="reap", player_name="p", points=1)
+
+    def reap(self, archive):
+        return services.reap_idle_runs(timedelta(days=1), batch_size=2, archive=archive)
+
+    def post(self, rid):
+        return self.client.post(f"/api/run/{rid}/end_turn")
+
+    def test_delete(self):
+        self.assertEqual(self.reap(archive=False), 3)
+        self.assertEqual(list(Run.objects.values_list("pk", flat=True)), [self.fresh])
+        self.assertFalse(RunAction.objects.filter(run_id__in=self.idle).exists())
+        self.assertFalse(EventLog.objects.filter(run_id__in=self.idle).exists())
+        self.assertIsNone(Score.objects.get().run_id)
+        self.assertEqual(self.post(self.idle[0]).status_code, 404)
+        request = RequestFactory().post(f"/api/run/{self.idle[0]}/end_turn")
+        response = async_to_sync(views_async.run_action_view)(request, pk=self.idle[0], kind="end_turn")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.reap(archive=False), 0)
+
+    def test_archive(self):
+        self.assertEqual(self.reap(archive=True), 3)
+        self.assertEqual(Run.objects.get(pk=self.fresh).status, "ongoing")
+        for rid in self.idle:
+            run, state, version = current_state(rid)
+            self.assertEqual((run.status, state.status, version), ("abandoned", "abandoned", 1))
+            self.assertFalse(EventLog.objects.filter(run_id=rid).exists())
+            self.assertTrue(services.run_events(rid))  # eventos no EventArchive
+        self.assertEqual(self.post(self.idle[0]).status_code, 400)
+        self.assertEqual(RunAction.objects.filter(run_id=self.idle[0]).count(), 1)
+        score = self.client.post(f"/api/run/{self.idle[1]}/score", {}, content_type="application/json")
+        self.assertEqual(score.status_code, 400)
+        self.assertEqual(self.reap(archive=True), 0)
+
+
+class RunEventsViewTests(TestCase):
+    def setUp(self):
+        self.run = Run.objects.create(seed="ev")
+        self.ids = [EventLog.objects.create(run=self.run, text=f"e{i}").id for i in range(5)]
+        self.url = f"/api/run/{self.run.pk}/events"
+
+    def test_cursor_pages(self):
+        seen, after = [], 0
+        while True:
+            body = self.client.get(f"{self.url}?after={after}&limit=2").json()
+            if not body["events"]:
+                self.assertEqual(body["next"], after)
+                break
+            self.assertLessEqual(len(body["events"]), 2)
+            seen += [e["id"] for e in body["events"]]
+            after = body["next"]
+        self.assertEqual(seen, self.ids)
+        self.assertEqual(self.client.get(f"{self.url}?after=x").status_code, 400)
+
+    def test_ndjson_stream(self):
+        for query, headers in (("", {"HTTP_ACCEPT": "application/x-ndjson"}), ("&format=ndjson", {})):
+            response = self.client.get(f"{self.url}?after={self.ids[1]}&limit=1{query}", **headers)
+            self.assertTrue(response.streaming)
+            self.assertEqual(response["Content-Type"], "application/x-ndjson")
+            rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+            self.assertEqual([(r["id"], r["text"]) for r in rows],
+                             [(pk, f"e{i}") for i, pk in enumerate(self.ids)][2:])  # ignora limit
+
+    def test_unknown_run_is_404(self):
+        self.assertEqual(self.client.get("/api/run/00000000-0000-0000-0000-000000000000/events").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/run/{uuid.uuid4()}/events?format=ndjson").status_code, 404)
+
+
+@override_settings(RUN_HOT_CACHE=False, ASYNC_API=False)
+class StateDeltaTests(TestCase):
+    """?since=N: só o que mudou desde a versão N que o cliente tem."""
+
+    def setUp(self):
+        self.rid = start_run("hot", 20)[0].pk
+        self.url = f"/api/run/{self.rid}"
+
+    def test_full_and_delta(self):
+        full = self.client.get(self.url).json()
+        self.assertNotIn("delta", full)
+        self.client.post(f"{self.url}/discard/0")
+        delta = self.client.get(f"{self.url}?since=0").json()
+        self.assertEqual((delta["delta"], delta["since"], delta["version"]), (True, 0, 1))
+        self.assertEqual(list(delta["board"]), ["0"])
+        self.assertIsNone(delta["board"]["0"])
+        self.assertNotIn("seed", delta)
+        same = self.client.get(f"{self.url}?since=1").json()
+        self.assertEqual(set(same), {"id", "version", "since", "delta"})
+        ahead = self.client.get(f"{self.url}?since=5").json()  # cliente à frente: estado completo
+        self.assertNotIn("delta", ahead)
+        self.assertEqual(ahead["version"], 1)
+
+    def test_before_reused_on_play(self):
+        with mock.patch("game.play.state_at", wraps=services.state_at) as state_at:
+            delta = self.client.post(f"{self.url}/discard/0?since=0").json()
+            state_at.assert_not_called()  # o estado lido era a versão `since`
+            self.assertEqual((delta["since"], list(delta["board"])), (0, ["0"]))
+            delta = self.client.post(f"{self.url}/discard/1?since=0").json()
+            state_at.assert_called_once()  # versão antiga: reconstrói pelo log
+            self.assertEqual((delta["since"], delta["version"]), (0, 2))
+            self.assertEqual(sorted(delta["board"]), ["0", "1"])
+
+
+def _ws(pk):
+    return ApplicationCommunicator(live.websocket_application, {"type": "websocket", "path": f"/ws/run/{pk}"})
+
+
+async def _ws_connect(pk):
+    """(communicator, frame inicial) já aceito."""
+    ws = _ws(pk)
+    await ws.send_input({"type": "websocket.connect"})
+    assert (await ws.receive_output(2))["type"] == "websocket.accept"
+    return ws, await _ws_frame(ws)
+
+
+async def _ws_frame(ws) -> dict:
+    return json.loads((await ws.receive_output(2))["text"])
+
+
+@override_settings(RUN_HOT_CACHE=False)
+class LiveDeltaTests(TestCase):
+    async def test_full_state_when_run_moved_elsewhere(self):
+        rid = (await sync_to_async(start_run)("hot", 20))[0].pk
+        ws, first = await _ws_connect(rid)
+        self.assertEqual(first["version"], 0)
+        await sync_to_async(play_actions)(rid, [("discard", 0)])  # jogada por HTTP
+        await ws.send_input({"type": "websocket.receive", "text": json.dumps({"id": 1, "action": "discard", "idx": 1})})
+        frame = await _ws_frame(ws)
+        self.assertNotIn("delta", frame)  # base (1) != última enviada (0)
+        self.assertEqual((frame["version"], frame["board"][0], frame["board"][1]), (2, None, None))
+        await ws.send_input({"type": "websocket.receive", "text": json.dumps({"id": 2, "action": "discard", "idx": 2})})
+        frame = await _ws_frame(ws)
+        self.assertEqual((frame["delta"], frame["since"], frame["version"], frame["reply"]), (True, 2, 3, 2))
+        await ws.send_input({"type": "websocket.disconnect", "code": 1000})
+        await ws.wait(1)
+
+
+@override_settings(RUN_HOT_CACHE=False)
+class LiveTests(TestCase):
+    def setUp(self):
+        self.rid = start_run("hot", 20)[0].pk
+
+    async def send(self, ws, **msg):
+        await ws.send_input({"type": "websocket.receive", "text": json.dumps(msg)})
+
+    async def close(self, *sockets):
+        for ws in sockets:
+            await ws.send_input({"type": "websocket.disconnect", "code": 1000})
+            await ws.wait(1)
+
+    async def test_state_reply_and_broadcast(self):
+        me, state = await _ws_connect(self.rid)
+        other, _ = await _ws_connect(self.rid)
+        self.assertEqual((state["type"], state["id"], state["version"]), ("state", str(self.rid), 0))
+        self.assertNotIn("deck", state)
+        await self.send(me, id=7, action="discard", idx=0)
+        mine, theirs = await _ws_frame(me), await _ws_frame(other)
+        self.assertEqual((mine["type"], mine["reply"], mine["version"]), ("update", 7, 1))
+        self.assertTrue(mine["events"])
+        self.assertNotIn("reply", theirs)
+        self.assertEqual({**theirs, "reply": 7}, mine)
+        await self.send(other, id=1, actions=[{"action": "discard", "idx": 1}, {"action": "discard", "idx": 2}])
+        self.assertEqual((await _ws_frame(me))["version"], 3)
+        self.assertEqual((await _ws_frame(other))["reply"], 1)
+        await self.close(me, other)
+        self.assertNotIn(self.rid, live.groups.groups)
+
+    async def test_error_only_to_sender(self):
+        me, _ = await _ws_connect(self.rid)
+        other, _ = await _ws_connect(self.rid)
+        await self.send(me, id=3, actions=[{"action": "discard", "idx": 0}, {"action": "fight", "idx": 0}])
+        error = await _ws_frame(me)
+        self.assertEqual((error["type"], error["reply"], error["index"]), ("error", 3, 1))
+        await me.send_input({"type": "websocket.receive", "text": "{"})
+        self.assertEqual((await _ws_frame(me))["detail"], "JSON inválido")
+        self.assertTrue(await other.receive_nothing(0.1))
+        self.assertEqual((await sync_to_async(current_state)(self.rid))[2], 0)  # nada gravado
+        await self.close(me, other)
+
+    async def test_bad_or_unknown_pk_closes_4404(self):
+        for pk in (uuid.uuid4(), "nao-e-uuid"):
+            ws = _ws(pk)
+            await ws.send_input({"type": "websocket.connect"})
+            self.assertEqual(await ws.receive_output(2), {"type": "websocket.close", "code": 4404})
+
+
+@override_settings(RUN_HOT_CACHE=False, ASYNC_API=False)
+class BatchActionsTests(TestCase):
+    def setUp(self):
+        self.rid = start_run("hot", 20)[0].pk
+        self.url = f"/api/run/{self.rid}/actions"
+
+    def post(self, actions):
+        return self.client.post(self.url, {"actions": actions}, content_type="application/json")
+
+    def test_illegal_action_rolls_back(self):
+        response = self.post([{"action": "discard", "idx": 0}, {"action": "discard", "idx": 1},
+                              {"action": "fight", "idx": 0}, {"action": "discard", "idx": 2}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["index"], 2)
+        run = Run.objects.get(pk=self.rid)
+        self.assertEqual(run.version, 0)
+        self.assertFalse(RunAction.objects.filter(run=run).exists())
+        self.assertEqual(current_state(self.rid)[1].board, new_state("hot", 20)[0].board)
+        self.assertEqual(self.post([{"action": "voar"}]).json()["index"], 0)
+
+    def test_size_limits(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {}, content_type="application/json").status_code, 400)
+        too_many = [{"action": "end_turn"}] * (MAX_BATCH_ACTIONS + 1)
+        self.assertEqual(self.post(too_many).status_code, 400)
+        self.assertEqual(Run.objects.get(pk=self.rid).version, 0)
+
+    def test_valid_batch_is_one_write(self):
+        actions = [{"action": "discard", "idx": i} for i in range(3)] + [{"action": "end_turn"}]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(actions)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["version"], len(actions))
+        sql = [q["sql"] for q in ctx.captured_queries]
+        self.assertEqual(sum(q.startswith('UPDATE "game_run" ') for q in sql), 1)  # um CAS
+        self.assertEqual(sum(q.startswith('INSERT INTO "game_runaction" ') for q in sql), 1)  # bulk
+        self.assertEqual(list(RunAction.objects.filter(run_id=self.rid).values_list("seq", flat=True)), [1, 2, 3, 4])
+
+
+@override_settings(RUN_HOT_CACHE=False, ASYNC_API=False)
+class RunMovesTests(TestCase):
+    def setUp(self):
+        self.rid = start_run("b", 20)[0].pk
+        self.url = f"/api/run/{self.rid}/moves"
+
+    def test_moves_and_hint(self):
+        body = self.client.get(self.url).json()
+        legal = [{"action": k, "idx": i} for k, i in legal_actions(current_state(self.rid)[1])]
+        self.assertEqual(body["moves"], legal)
+        self.assertNotIn("hint", body)
+        for asked, depth in (("0", 1), ("-3", 1), ("2", 2), ("99", MAX_DEPTH)):
+            hint = self.client.get(f"{self.url}?hint={asked}").json()["hint"]
+            self.assertEqual(hint["depth"], depth, asked)
+            self.assertLessEqual(len(hint["line"]), depth)
+            self.assertIn({"action": hint["action"], "idx": hint["idx"]}, legal)
+            self.assertEqual(hint["line"][0], {"action": hint["action"], "idx": hint["idx"]})
+        self.assertEqual(self.client.get(f"{self.url}?hint=abc").status_code, 400)
+
+    def test_hint_line_is_playable(self):
+        state = current_state(self.rid)[1]
+        hint = best_move(state, MAX_DEPTH)
+        for action in hint.line:
+            self.assertIn(action, legal_actions(state))
+            apply(state, action)
+
+    def test_finished_run(self):
+        _play_out(self.rid, random.Random(2))
+        body = self.client.get(f"{self.url}?hint=3").json()
+        self.assertNotEqual(body["status"], "ongoing")
+        self.assertEqual(body["moves"], [])
+        self.assertIsNone(body["hint"])
+
+
+class PlayerBestTests(TestCase):
+    def test_keeps_max_points_and_latest_submit(self):
+        t0 = timezone.now()
+        services.update_player_best("ana", 50, t0)
+        services.update_player_best("ana", 30, t0 + timedelta(hours=1))  # pior, mais recente
+        best = PlayerBest.objects.get(player_name="ana")
+        self.assertEqual((best.points, best.last_at), (50, t0 + timedelta(hours=1)))
+        services.update_player_best("ana", 80, t0)
+        best.refresh_from_db()
+        self.assertEqual((best.points, best.last_at), (80, t0 + timedelta(hours=1)))
+        self.assertEqual(PlayerBest.objects.count(), 1)
+
+    def test_backfill_matches_scores(self):
+        t0 = timezone.now()
+        for i, (player, points) in enumerate((("ana", 10), ("ana", 40), ("bia", 5), ("caio", 7), ("bia", 3))):
+            Score.objects.create(player_name=player, points=points, created_at=t0 + timedelta(minutes=i))
+        PlayerBest.objects.create(player_name="ana", points=999, last_at=t0)  # desatualizado
+        PlayerBest.objects.create(player_name="sumiu", points=1, last_at=t0)  # sem envios
+        out = io.StringIO()
+        call_command("backfill_player_best", "--batch-size", "2", stdout=out)
+        expected = {}
+        for player, points, at in Score.objects.values_list("player_name", "points", "created_at"):
+            best, last = expected.get(player, (points, at))
+            expected[player] = (max(best, points), max(last, at))
+        self.assertEqual({b.player_name: (b.points, b.last_at) for b in PlayerBest.objects.all()}, expected)
+        self.assertIn("3 jogador(es) atualizados, 1 removido(s)", out.getvalue())
+
+
+@override_settings(RUN_HOT_CACHE=False, ASYNC_API=False)
+class RankingConditionalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Score.objects.create(player_name="velho", points=1)
+
+    def submit(self, player):
+        run = _play_out(start_run("a", 20)[0].pk, random.Random(1))
+        with self.captureOnCommitCallbacks(execute=True):  # bump_ranking_version roda no commit
+            response = self.client.post(f"/api/run/{run.pk}/score", {"player_name": player},
+                                        content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_304_and_invalidation(self):
+        for i, path in enumerate(("/api/ranking?mode=runs", "/ranking/")):
+            first = self.client.get(path)
+            etag = first["ETag"]
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304, path)
+            self.assertEqual(self.client.get(path).content, first.content)  # do cache
+
+            player = f"novo{i}"
+            self.submit(player)
+            fresh = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(fresh.status_code, 200, path)
+            self.assertNotEqual(fresh["ETag"], etag)
+            self.assertIn(player.encode(), fresh.content)
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=fresh["ETag"]).status_code, 304)
+
+
+@override_settings(METRICS_TOKEN="mt", RUN_HOT_CACHE=False, ASYNC_API=False)
+class MetricsTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(metrics, "registry", metrics.Registry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scrape(self, auth="Bearer mt"):
+        return self.client.get("/api/metrics", HTTP_AUTHORIZATION=auth)
+
+    def test_token(self):
+        for auth in ("", "Bearer errado", "Bearer çãé"):
+            self.assertEqual(self.scrape(auth).status_code, 403, auth)
+        self.assertEqual(self.scrape().status_code, 200)
+
+    def test_counts_requests_and_queries(self):
+        rid = start_run("m", 20)[0].pk
+        for _ in range(2):
+            self.client.get(f"/api/run/{rid}")
+        self.client.get(f"/api/run/{uuid.uuid4()}")
+        text = self.scrape().content.decode()
+        labels = 'route="api/run/<uuid:pk>",method="GET"'
+        self.assertIn(f'hns_http_requests_total{{{labels},status="200"}} 2', text)
+        self.assertIn(f'hns_http_requests_total{{{labels},status="404"}} 1', text)
+        self.assertIn(f"hns_db_queries_per_request_count{{{labels}}} 3", text)
+        self.assertIn(f"hns_db_queries_per_request_sum{{{labels}}} {2 * EXPECTED_QUERIES['state'] + 1}", text)
+
+
+class AsyncApiUrls:
+    """ROOT_URLCONF com as views async (backend.urls escolhe pelo ASYNC_API uma vez, no import)."""
+    urlpatterns = backend_urls.API_ASYNC
+
+
+@override_settings(RUN_HOT_CACHE=False, ASYNC_API=False)
+class AsyncApiTests(TestCase):
+    """views_async pelo cliente async: mesmas respostas, byte a byte, que a API síncrona."""
+
+    def setUp(self):
+        cache.clear()
+        self.sync_rid = self.async_rid = ""
+
+    def both(self, method, path, data=None, headers=None):
+        """(resposta síncrona, resposta async); `path` pode ter {rid}, trocado pela run de cada lado."""
+        kwargs = {"content_type": "application/json"} if method == "post" else {}
+        sync = getattr(self.client, method)(path.format(rid=self.sync_rid), data, headers=headers, **kwargs)
+        with override_settings(ROOT_URLCONF=AsyncApiUrls):
+            call = getattr(self.async_client, method)
+            asy = async_to_sync(call)(path.format(rid=self.async_rid), data, headers=headers, **kwargs)
+        return sync, asy
+
+    def assertSame(self, sync, asy):
+        self.assertEqual(sync.status_code, asy.status_code)
+        self.assertEqual(sync["Content-Type"], asy["Content-Type"])
+        self.assertEqual(sync.content.replace(str(self.sync_rid).encode(), str(self.async_rid).encode()), asy.content)
+
+    def start(self):
+        sync, asy = self.both("post", "/api/start", {"seed": "hot"})
+        self.sync_rid, self.async_rid = sync.json()["id"], asy.json()["id"]
+        self.assertSame(sync, asy)
+        self.assertEqual(asy.status_code, 201)
+
+    def test_same_bodies(self):
+        self.start()
+        self.assertSame(*self.both("post", "/api/run/{rid}/discard/0"))
+        self.assertSame(*self.both("post", "/api/run/{rid}/discard/1?since=1"))
+        self.assertSame(*self.both("post", "/api/run/{rid}/actions",
+                                   {"actions": [{"action": "discard", "idx": 2}, {"action": "end_turn"}]}))
+        self.assertSame(*self.both("get", "/api/run/{rid}?since=2"))
+        self.assertEqual(Run.objects.get(pk=self.async_rid).version, 4)
+
+    def test_batch_errors(self):
+        self.start()
+        bad = {"actions": [{"action": "discard", "idx": 0}, {"action": "fight", "idx": 0}]}
+        sync, asy = self.both("post", "/api/run/{rid}/actions", bad)
+        self.assertSame(sync, asy)
+        self.assertEqual((asy.status_code, asy.json()["index"]), (400, 1))
+        self.assertSame(*self.both("post", "/api/run/{rid}/actions", {"actions": []}))
+        self.assertEqual(Run.objects.get(pk=self.async_rid).version, 0)
+
+    def test_version_conflict_is_409(self):
+        self.start()
+        with mock.patch("game.views_async.play_actions", side_effect=services.VersionConflict("x")), \
+                mock.patch("game.views.play_actions", side_effect=services.VersionConflict("x")):
+            sync, asy = self.both("post", "/api/run/{rid}/end_turn")
+        self.assertSame(sync, asy)
+        self.assertEqual(asy.status_code, 409)
+
+    def test_ranking_304(self):
+        Score.objects.create(player_name="p", points=3)
+        sync, asy = self.both("get", "/api/ranking?mode=runs")
+        self.assertSame(sync, asy)
+        self.assertEqual(sync["ETag"], asy["ETag"])
+        etag = {"If-None-Match": asy["ETag"]}
+        sync, asy = self.both("get", "/api/ranking?mode=runs", headers=etag)
+        self.assertEqual((sync.status_code, asy.status_code), (304, 304))
+        bump_ranking_version()
+        self.assertEqual(self.both("get", "/api/ranking?mode=runs", headers=etag)[1].status_code, 200)
+
+
+@override_settings(RUN_HOT_CACHE=False, ASYNC_API=False)
+class DailyChallengeTests(TestCase):
+    def test_seed_per_date(self):
+        day = date(2026, 3, 1)
+        seed = daily_seed(day)
+        self.assertEqual(seed, daily_seed(day))
+        self.assertTrue(seed.startswith("daily-2026-03-01-"))
+        self.assertNotEqual(seed, daily_seed(day + timedelta(days=1)))
+        with override_settings(SECRET_KEY="outra"):
+            self.assertNotEqual(seed, daily_seed(day))  # ninguém calcula sem a chave
+
+    def test_daily_endpoint_and_start(self):
+        body = self.client.get("/api/daily").json()
+        today = timezone.localdate()
+        self.assertEqual(set(body), {"date", "seed", "ends_at"})
+        self.assertEqual((body["date"], body["seed"]), (today.isoformat(), daily_seed(today)))
+        ends_at = datetime.fromisoformat(body["ends_at"])
+        self.assertEqual(timezone.localtime(ends_at).date(), today + timedelta(days=1))
+        self.assertEqual(timezone.localtime(ends_at).time(), time.min)
+        run = self.client.post("/api/start", {"daily": True, "seed": "ignorada"}, content_type="application/json")
+        self.assertEqual(run.json()["seed"], body["seed"])
+
+    def test_ranking_by_seed(self):
+        cache.clear()
+        for seed, points in (("d1", 5), ("d2", 9), ("d1", 7)):
+            Score.objects.create(seed=seed, player_name=f"{seed}-{points}", points=points)
+        for mode in ("runs", "best"):  # com seed, "best" também lista as runs da seed
+            rows = self.client.get(f"/api/ranking?mode={mode}&seed=d1").json()
+            self.assertEqual([r["points"] for r in rows], [7, 5], mode)
+        self.assertEqual(len(self.client.get("/api/ranking?mode=runs").json()), 3)
+        self.assertEqual(list(api_rows("runs", "d2")[0].values_list("points", flat=True)), [9])
+
+
+class EventBufferTests(TestCase):
+    def setUp(self):
+        self.run = Run.objects.create(seed="buf")
+
+    def test_one_bulk_create_on_exit(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with services.EventBuffer() as buf:
+                buf.add(self.run, "a")
+                buf.extend(self.run, ["b", "c"])
+                self.assertEqual(len(buf), 3)
+                self.assertEqual(len(ctx.captured_queries), 0)  # nada antes de sair
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertTrue(ctx.captured_queries[0]["sql"].startswith('INSERT INTO "game_eventlog"'))
+        self.assertEqual(list(EventLog.objects.filter(run=self.run).order_by("id").values_list("text", flat=True)),
+                         ["a", "b", "c"])
+        self.assertEqual(len(buf), 0)
+
+    def test_nothing_written_when_block_raises(self):
+        with CaptureQueriesContext(connection) as ctx, self.assertRaises(ValueError):
+            with services.EventBuffer() as buf:
+                buf.add(self.run, "a")
+                raise ValueError
+        self.assertEqual(ctx.captured_queries, [])
+        self.assertFalse(EventLog.objects.exists())
+        with CaptureQueriesContext(connection) as ctx, services.EventBuffer():
+            pass
+        self.assertEqual(ctx.captured_queries, [])  # buffer vazio não vai ao banco
+
+
+class SimulateCommandTests(SimpleTestCase):
+    def simulate(self, *args):
+        out = io.StringIO()
+        call_command("simulate", "--seeds", "6", "--chunk", "4", "--seed-prefix", "smoke-", *args, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn("policy=greedy runs=6 workers=1", lines[0])
+        return lines[1:]  # sem a linha do tempo
+
+    def test_smoke_and_determinism(self):
+        report = self.simulate()
+        self.assertEqual(report, self.simulate())
+        self.assertTrue(report[0].startswith("vitórias: "))
+        scores = [simulate_run(f"smoke-{i}", greedy_policy)["score"] for i in range(6)]
+        self.assertIn(f"max={max(scores)}", report[1])
+        with mock.patch.object(engine, "ENEMY_HOLD_LIMIT", engine.ENEMY_HOLD_LIMIT):  # --set vale no processo
+            self.assertNotEqual(report, self.simulate("--set", "ENEMY_HOLD_LIMIT=1"))
+        with self.assertRaises(CommandError):
+            self.simulate("--set", "NAO_EXISTE=1")
+
+
+@override_settings(RUN_HOT_CACHE=False, ASYNC_API=False, RUN_CAS_RETRIES=2)
+class CorruptRunLogTests(TestCase):
+    """Log de ações com buraco: erro explícito, sem repetir nem virar 409."""
+
+    def setUp(self):
+        self.rid = start_run("hot", 20)[0].pk
+        play_actions(self.rid, [("discard", 0), ("discard", 1)])
+        RunAction.objects.filter(run_id=self.rid, seq=1).delete()
+
+    def test_http(self):
+        for path in (f"/api/run/{self.rid}", f"/api/run/{self.rid}/moves"):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 500, path)
+            self.assertEqual(response.json()["detail"], CORRUPT_LOG_DETAIL)
+        with mock.patch("game.play.load_run", wraps=services.load_run) as load_run:
+            response = self.client.post(f"/api/run/{self.rid}/discard/2")
+        self.assertEqual((response.status_code, load_run.call_count), (500, 1))
+        with override_settings(RUN_HOT_CACHE=True), mock.patch.object(hotruns, "hot_runs", hotruns.HotRunCache()):
+            self.assertEqual(self.client.get(f"/api/run/{self.rid}").status_code, 500)
+        self.assertEqual(Run.objects.get(pk=self.rid).version, 2)
+
+    def test_async_and_live(self):
+        factory = RequestFactory()
+        for view, request, kwargs in ((views_async.run_detail_view, factory.get("/"), {}),
+                                      (views_async.run_action_view, factory.post("/"), {"kind": "end_turn"})):
+            response = async_to_sync(view)(request, pk=self.rid, **kwargs)
+            self.assertEqual(response.status_code, 500)
+            self.assertEqual(json.loads(response.content)["detail"], CORRUPT_LOG_DETAIL)
+
+        async def connect():
+            ws = _ws(self.rid)
+            await ws.send_input({"type": "websocket.connect"})
+            return await ws.receive_output(2)
+        self.assertEqual(async_to_sync(connect)(), {"type": "websocket.close", "code": 1011})
+
+    def test_reaper_skips_it(self):
+        Run.objects.filter(pk=self.rid).update(last_activity=timezone.now() - timedelta(days=2))
+        self.assertEqual(services.reap_idle_runs(timedelta(days=1), archive=True), 0)
+        self.assertEqual(Run.objects.get(pk=self.rid).status, "ongoing")
@@ -1,4 +1,5 @@
 import random
+from functools import lru_cache
 from typing import List, Dict
 
 Suit = ['clubs','spades','hearts','diamonds']
@@ -8,17 +9,52 @@ def rank_power(r)->int:
     if isinstance(r,int): return r
     return {'J':11,'Q':12,'K':13,'A':14}[r]
 
-def new_deck(seed:str)->List[Dict]:
+def _suit_type(s)->str:
+    if s in ('clubs','spades'): return 'enemy'
+    if s == 'hearts': return 'heal'
+    return 'weapon'  # diamonds
+
+# --- cartas compactas: código 0..51 = índice_naipe*13 + índice_rank ---
+# Mesma ordem de new_deck(), então o shuffle com a mesma seed dá a mesma permutação.
+CARD_SUIT = tuple(s for s in Suit for r in Rank)
+CARD_RANK = tuple(r for s in Suit for r in Rank)
+CARD_ID = tuple(f"{s}-{r}" for s in Suit for r in Rank)
+CARD_POWER = tuple(rank_power(r) for r in CARD_RANK)
+CARD_TYPE = tuple(_suit_type(s) for s in CARD_SUIT)
+_CODE_BY_ID = {cid: code for code, cid in enumerate(CARD_ID)}
+
+def card_code(card)->int:
+    if isinstance(card,int): return card
+    return _CODE_BY_ID[f"{card['suit']}-{card['rank']}"]
+
+def card_dict(code:int)->Dict:
+    return {"id": CARD_ID[code], "suit": CARD_SUIT[code], "rank": CARD_RANK[code]}
+
+DECK_CACHE_SIZE = 1024  # seeds com baralho pronto (52 bytes cada)
+
+@lru_cache(maxsize=DECK_CACHE_SIZE)
+def _shuffled(seed:str)->bytes:
     rng = random.Random(seed)
-    deck = [{"id": f"{s}-{r}", "suit": s, "rank": r} for s in Suit for r in Rank]
+    deck = list(range(len(CARD_ID)))
     rng.shuffle(deck)
-    return deck
+    return bytes(deck)
+
+def new_deck_codes(seed:str)->bytearray:
+    """Como new_deck(), mas com códigos 0..51 (topo = último).
+
+    O embaralhamento fica num cache LRU por seed: seeds populares (desafio
+    diário, replays da mesma run) não reembaralham. Cada chamada recebe uma
+    cópia mutável.
+    """
+    return bytearray(_shuffled(seed))
+
+def new_deck(seed:str)->List[Dict]:
+    return [card_dict(c) for c in new_deck_codes(seed)]
 
 def classify_card(card)->str:
-    s = card['suit']
-    if s in ('clubs','spades'): return 'enemy'
-    if s == 'hearts': return 'heal'
-    return 'weapon'  # diamonds
+    if isinstance(card,int): return CARD_TYPE[card]
+    return _suit_type(card['suit'])
 
 def enemy_power(card)->int:
+    if isinstance(card,int): return CARD_POWER[card]
     return rank_power(card['rank'])
@@ -0,0 +1,43 @@
+# game/verify.py
+"""Conferência de score por replay, sem Django.
+
+O log de ações de uma run, reaplicado pelo motor a partir de
+new_state(seed, max_hp), tem que ser aceito ação por ação e chegar ao
+mesmo status e score gravados. Usado em SubmitScoreView (uma run) e em
+`manage.py audit_scores` (o ranking inteiro, em processos paralelos).
+"""
+from typing import List, NamedTuple, Optional, Tuple
+
+from .engine import ACTIONS, IllegalAction, new_state, apply
+
+
+class RunLog(NamedTuple):
+    run_id: object
+    seed: str
+    max_hp: int
+    version: int                      # seq da última ação gravada
+    status: str                       # gravados na run
+    score_total: int
+    actions: List[Tuple[int, int]]    # (kind, idx) do RunAction, em ordem de seq
+
+
+def check_log(log: RunLog) -> Tuple[Optional[int], Optional[str]]:
+    """(score do replay, motivo da divergência | None)."""
+    if len(log.actions) != log.version:
+        return None, f"log incompleto: {len(log.actions)} ação(ões) para a versão {log.version}"
+    state, _ = new_state(log.seed, log.max_hp)
+    for seq, (kind, idx) in enumerate(log.actions, 1):
+        try:
+            apply(state, (ACTIONS[kind], idx))
+        except IllegalAction as e:
+            return None, f"ação {seq} ({ACTIONS[kind]}) recusada no replay: {e.detail}"
+    if state.status != log.status:
+        return state.score_total, f"replay termina {state.status}, run gravada {log.status}"
+    if state.score_total != log.score_total:
+        return state.score_total, f"replay dá {state.score_total} pts, run gravada {log.score_total}"
+    return state.score_total, None
+
+
+def check_batch(logs: List[RunLog]) -> list:
+    """[(run_id, score do replay, motivo | None)]; para ProcessPoolExecutor."""
+    return [(log.run_id, *check_log(log)) for log in logs]
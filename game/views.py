@@ -1,243 +1,207 @@
-from rest_framework import status, views, generics
+from rest_framework import renderers, views
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
 from django.db import transaction
-
-from .models import Run, EventLog, Score
-from .serializers import RunSerializer
-from .utils import new_deck, classify_card, rank_power, enemy_power
-
-BOSS_BONUS = 6
-MAX_TURNS_SPEED = 26
-BOARD_SLOTS = 4
-ENEMY_HOLD_LIMIT = 2  # inimigo pode ficar no máximo 2 turnos mantido
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .challenge import daily_info, daily_seed
+from .models import Run, Score
+from .engine import IllegalAction, legal_actions
+from .hints import MAX_DEPTH, best_move
+from .play import MAX_BATCH_ACTIONS, current_state, play_actions, start_run, state_payload
+from .services import (CorruptRunLog, EventBuffer, VersionConflict, iter_run_events, update_player_best,
+                       verify_run)
+from .ranking import (cached_ranking, bump_ranking_version, ranking_etag, ranking_last_modified,
+                      keyset_page, api_rows)
+
+RANKING_MAX_LIMIT = 500
+EVENTS_MAX_LIMIT = 1000
+NDJSON = "application/x-ndjson"
+CORRUPT_LOG_DETAIL = "log de ações da run corrompido; ela não pode ser carregada"
 
 # ---------------- helpers ----------------
 
-def _ensure_board(run: Run):
-    if not isinstance(run.board, list) or len(run.board) != BOARD_SLOTS:
-        run.board = [None]*BOARD_SLOTS
-
-def _refill_board(run: Run):
-    """Completa slots vazios com cartas do topo da deck."""
-    _ensure_board(run)
-    changed = False
-    for i in range(BOARD_SLOTS):
-        if run.board[i] is None and run.deck:
-            c = run.deck.pop()
-            slot = {"card": c, "type": classify_card(c), "held": 0}
-            run.board[i] = slot
-            EventLog.objects.create(run=run, text=f"Slot {i+1}: virou {slot['type']} {c['suit']}-{c['rank']}.")
-            changed = True
-    return changed
-
-def _require_slot(run: Run, idx: int):
-    _ensure_board(run)
-    if idx < 0 or idx >= BOARD_SLOTS: 
-        return None, Response({"detail":"slot inválido (0..3)"}, status=400)
-    slot = run.board[idx]
-    if slot is None:
-        return None, Response({"detail":"slot vazio"}, status=400)
-    return slot, None
-
-def _finish_run_if_deck_ends(run: Run):
-    if run.status == "ongoing" and not run.deck:
-        # aplica bônus final só uma vez
-        if not run.final_scored:
-            victory_bonus = 30
-            speed_bonus = max(0, 2 * (MAX_TURNS_SPEED - run.turn))
-            run.score_total += victory_bonus + run.hp + speed_bonus
-            run.final_scored = True
-            EventLog.objects.create(run=run, text=f"Vitória! +30 +HP({run.hp}) +Speed({speed_bonus}). Score={run.score_total}.")
-        run.status = "won"
-
-def _score_kill(run: Run, val: int):
-    base = val + (BOSS_BONUS if val == 14 else 0)
-    run.combo_len += 1
-    mult = 1 + 0.20 * (run.combo_len - 1)
-    pts = round(base * mult)
-    run.score_total += pts
-    run.session_points += pts
-    EventLog.objects.create(run=run, text=f"Kill {val}: +{pts} (combo {run.combo_len} ×{mult:.1f}). Score={run.score_total}.")
-    if val == 2 and not run.descida_ate2:
-        run.score_total += run.session_points  # dobra retroativo
-        run.descida_ate2 = True
-        EventLog.objects.create(run=run, text=f"BÔNUS descida até 2: +{run.session_points}.")
+def _since(request):
+    """Versão que o cliente já tem (?since=N) para o modo delta; None = estado completo."""
+    try:
+        return int(request.query_params["since"])
+    except (KeyError, ValueError):
+        return None
+
+def _state_response(request, run, state, version, before=None, status=200):
+    """Estado público da run; com ?since=N devolve só o que mudou desde a versão N."""
+    return Response(state_payload(run, state, version, _since(request), before), status=status)
+
+def _play(request, pk, actions, batch=False):
+    """Aplica as ações (ver play.play_actions) e responde com o estado/delta.
+
+    Ação ilegal -> 400 (no modo batch com o índice da ação recusada);
+    conflito de versão após as tentativas -> 409; run inexistente -> 404;
+    log de ações corrompido -> 500 (sem repetir).
+    """
+    try:
+        played = play_actions(pk, actions, batch, _since(request))
+    except Run.DoesNotExist:
+        raise Http404
+    except IllegalAction as e:
+        body = {"detail": e.detail}
+        if batch: body["index"] = e.index
+        return Response(body, status=400)
+    except VersionConflict:
+        return Response({"detail":"a run mudou em outra requisição; recarregue"}, status=409)
+    except CorruptRunLog:
+        return Response({"detail":CORRUPT_LOG_DETAIL}, status=500)
+    return _state_response(request, played.run, played.state, played.version, played.before)
 
 # ---------------- API ----------------
 
 class StartRunView(views.APIView):
-    """POST /api/start  body: {seed:str?, max_hp:int?}"""
-    @transaction.atomic
+    """POST /api/start  body: {seed:str?, max_hp:int?, daily:bool?} — daily usa a seed do dia"""
     def post(self, request):
-        seed = request.data.get("seed") or "default-seed"
+        seed = daily_seed() if request.data.get("daily") else (request.data.get("seed") or "default-seed")
         max_hp = int(request.data.get("max_hp", 20))
-        deck = new_deck(seed)
-        run = Run.objects.create(
-            seed=seed, max_hp=max_hp, hp=max_hp, deck=deck, discard=[],
-            board=[None]*BOARD_SLOTS, turn=1, emptied_this_turn=0,
-            power=0, score_total=0, equip_session=0, combo_len=0,
-            session_points=0, descida_ate2=False, final_scored=False
-        )
-        _refill_board(run)
-        EventLog.objects.create(run=run, text=f"Run iniciada. Seed={seed}.")
-        run.save()
-        return Response(RunSerializer(run).data, status=201)
+        run, state = start_run(seed, max_hp)
+        return _state_response(request, run, state, 0, status=201)
 
-class RunDetailView(generics.RetrieveAPIView):
-    queryset = Run.objects.all()
-    serializer_class = RunSerializer
+class DailyView(views.APIView):
+    """GET /api/daily — {date, seed, ends_at} do desafio diário"""
+    def get(self, request):
+        return Response(daily_info())
+
+class RunDetailView(views.APIView):
+    """GET /api/run/<uuid>[?since=N] — estado público (ou delta desde a versão N)"""
+    def get(self, request, pk):
+        try:
+            run, state, version = current_state(pk)
+        except Run.DoesNotExist:
+            raise Http404
+        except CorruptRunLog:
+            return Response({"detail":CORRUPT_LOG_DETAIL}, status=500)
+        return _state_response(request, run, state, version)
 
 class EquipFromSlotView(views.APIView):
     """POST /api/run/<uuid>/equip/<int:idx>  (idx = 0..3)"""
-    @transaction.atomic
     def post(self, request, pk, idx: int):
-        run = Run.objects.select_for_update().get(pk=pk)
-        if run.status != "ongoing": return Response({"detail":"run finalizada"}, status=400)
-        slot, err = _require_slot(run, idx)
-        if err: return err
-        if slot["type"] != "weapon":
-            return Response({"detail":"slot não é arma"}, status=400)
-        val = rank_power(slot["card"]["rank"])
-
-        # iniciar nova sessão de equipamento
-        run.equip_session += 1
-        run.combo_len = 0
-        run.session_points = 0
-        run.descida_ate2 = False
-
-        run.power = val
-        run.discard.append(slot["card"])
-        run.board[idx] = None
-        run.emptied_this_turn += 1
-
-        EventLog.objects.create(run=run, text=f"Equipou ♦️{val}. Sessão #{run.equip_session}. PWR={run.power}.")
-        run.save()
-        return Response(RunSerializer(run).data)
+        return _play(request, pk, [("equip", idx)])
 
 class DiscardFromSlotView(views.APIView):
     """POST /api/run/<uuid>/discard/<int:idx> — descarta arma/vida"""
-    @transaction.atomic
     def post(self, request, pk, idx: int):
-        run = Run.objects.select_for_update().get(pk=pk)
-        if run.status != "ongoing": return Response({"detail":"run finalizada"}, status=400)
-        slot, err = _require_slot(run, idx)
-        if err: return err
-        if slot["type"] not in ("weapon","heal"):
-            return Response({"detail":"para inimigo, use pay_life ou fight"}, status=400)
-        run.discard.append(slot["card"])
-        run.board[idx] = None
-        run.emptied_this_turn += 1
-        EventLog.objects.create(run=run, text=f"Descartou {slot['type']} {slot['card']['suit']}-{slot['card']['rank']}.")
-        run.save()
-        return Response(RunSerializer(run).data)
+        return _play(request, pk, [("discard", idx)])
 
 class UseHealFromSlotView(views.APIView):
     """POST /api/run/<uuid>/use_heal/<int:idx> — usa cura do slot"""
-    @transaction.atomic
     def post(self, request, pk, idx: int):
-        run = Run.objects.select_for_update().get(pk=pk)
-        if run.status != "ongoing": return Response({"detail":"run finalizada"}, status=400)
-        slot, err = _require_slot(run, idx)
-        if err: return err
-        if slot["type"] != "heal":
-            return Response({"detail":"slot não é cura"}, status=400)
-
-        val = rank_power(slot["card"]["rank"])
-        run.hp = min(run.max_hp, run.hp + val)
-        run.discard.append(slot["card"])
-        run.board[idx] = None
-        run.emptied_this_turn += 1
-
-        EventLog.objects.create(run=run, text=f"Usou ♥️{val}. HP={run.hp}.")
-        run.save()
-        return Response(RunSerializer(run).data)
+        return _play(request, pk, [("use_heal", idx)])
 
 class FightFromSlotView(views.APIView):
     """POST /api/run/<uuid>/fight/<int:idx> — luta (se puder vencer)"""
-    @transaction.atomic
     def post(self, request, pk, idx: int):
-        run = Run.objects.select_for_update().get(pk=pk)
-        if run.status != "ongoing": return Response({"detail":"run finalizada"}, status=400)
-        slot, err = _require_slot(run, idx)
-        if err: return err
-        if slot["type"] != "enemy":
-            return Response({"detail":"slot não é inimigo"}, status=400)
-
-        val = enemy_power(slot["card"])
-        if run.power < val:
-            return Response({"detail":"poder insuficiente; pague vida ou mantenha"}, status=400)
-
-        # derrota: pontua + absorve valor
-        _score_kill(run, val)
-        run.power = val
-        run.discard.append(slot["card"])
-        run.board[idx] = None
-        run.emptied_this_turn += 1
-
-        run.save()
-        return Response(RunSerializer(run).data)
+        return _play(request, pk, [("fight", idx)])
 
 class PayLifeDiscardView(views.APIView):
     """POST /api/run/<uuid>/pay_life/<int:idx> — paga vida = valor do inimigo e descarta"""
-    @transaction.atomic
     def post(self, request, pk, idx: int):
-        run = Run.objects.select_for_update().get(pk=pk)
-        if run.status != "ongoing": return Response({"detail":"run finalizada"}, status=400)
-        slot, err = _require_slot(run, idx)
-        if err: return err
-        if slot["type"] != "enemy":
-            return Response({"detail":"slot não é inimigo"}, status=400)
-
-        val = enemy_power(slot["card"])
-        run.hp -= val
-        run.discard.append(slot["card"])
-        run.board[idx] = None
-        run.emptied_this_turn += 1
-        EventLog.objects.create(run=run, text=f"Pagou {val} de vida para descartar inimigo. HP={run.hp}.")
-
-        if run.hp <= 0:
-            run.status = "lost"
-            EventLog.objects.create(run=run, text="Você caiu em batalha. Derrota.")
-        run.save()
-        return Response(RunSerializer(run).data)
+        return _play(request, pk, [("pay_life", idx)])
 
 class EndTurnView(views.APIView):
     """POST /api/run/<uuid>/end_turn — avança turno se >=2 slots esvaziados e regras de manter ok"""
-    @transaction.atomic
     def post(self, request, pk):
-        run = Run.objects.select_for_update().get(pk=pk)
-        if run.status != "ongoing": return Response({"detail":"run finalizada"}, status=400)
-
-        if run.emptied_this_turn < 2:
-            return Response({"detail":"você precisa esvaziar pelo menos 2 slots para terminar o turno"}, status=400)
-
-        # regras de manter: ♦️ não pode ficar; inimigos no máximo 2 turnos
-        _ensure_board(run)
-        for i, slot in enumerate(run.board):
-            if slot is None: continue
-            if slot["type"] == "weapon":
-                return Response({"detail": f"arma no slot {i+1} não pode ser mantida; equipar ou descartar"}, status=400)
-
-        # incrementar contadores de 'held' para inimigos; bloquear se exceder
-        for i, slot in enumerate(run.board):
-            if slot and slot["type"] == "enemy":
-                slot["held"] = int(slot.get("held", 0)) + 1
-                if slot["held"] > ENEMY_HOLD_LIMIT:
-                    return Response({"detail": f"inimigo no slot {i+1} já foi mantido por {ENEMY_HOLD_LIMIT} turnos; resolva-o"}, status=400)
-
-        run.turn += 1
-        run.emptied_this_turn = 0
+        return _play(request, pk, [("end_turn", None)])
 
-        # reabastece mesa
-        _refill_board(run)
-        _finish_run_if_deck_ends(run)
+class BatchActionsView(views.APIView):
+    """POST /api/run/<uuid>/actions  body: {actions:[{action:str, idx:int?}, ...]}
 
-        EventLog.objects.create(run=run, text=f"Início do turno {run.turn}.")
-        run.save()
-        return Response(RunSerializer(run).data)
+    Aplica as ações em ordem, sob um único lock e uma única escrita.
+    """
+    def post(self, request, pk):
+        actions = request.data.get("actions")
+        if not isinstance(actions, list) or not actions:
+            return Response({"detail":"envie uma lista 'actions' não vazia"}, status=400)
+        if len(actions) > MAX_BATCH_ACTIONS:
+            return Response({"detail":f"no máximo {MAX_BATCH_ACTIONS} ações por requisição"}, status=400)
+        return _play(request, pk, actions, batch=True)
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """JSON por linha (application/x-ndjson); erros saem como uma linha só."""
+    media_type = NDJSON
+    format = "ndjson"
+    charset = "utf-8"
+    encoder = JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return (self.encoder.encode(data) + "\n").encode()
+
+    def lines(self, rows):
+        return (self.encoder.encode(row) + "\n" for row in rows)
+
+def _event(row) -> dict:
+    pk, created_at, text = row
+    return {"id": pk, "created_at": created_at, "text": text}
+
+class RunEventsView(views.APIView):
+    """GET /api/run/<uuid>/events?after=<id>&limit=N — log da run a partir de um cursor
+
+    JSON: {events:[{id, created_at, text}], next:<id>}; o cliente guarda
+    `next` e pede só o que veio depois. Com `Accept: application/x-ndjson`
+    (ou `?format=ndjson`), manda o resto do log inteiro, um evento por
+    linha, sem montar a lista em memória. Com o cache quente ligado, os
+    eventos de jogadas ainda não gravadas aparecem no próximo flush.
+    """
+    renderer_classes = [*views.APIView.renderer_classes, NDJSONRenderer]
+
+    def get(self, request, pk):
+        try:
+            after = max(0, int(request.GET.get("after", 0)))
+            limit = min(EVENTS_MAX_LIMIT, max(1, int(request.GET.get("limit", EVENTS_MAX_LIMIT // 2))))
+        except ValueError:
+            return Response({"detail":"after/limit inválido"}, status=400)
+        if not Run.objects.filter(pk=pk).exists():
+            raise Http404
+
+        if isinstance(request.accepted_renderer, NDJSONRenderer):
+            rows = (_event(row) for row in iter_run_events(pk, after))
+            return StreamingHttpResponse(request.accepted_renderer.lines(rows), content_type=NDJSON)
+
+        events = [_event(row) for row in iter_run_events(pk, after, limit)]
+        return Response({"events": events, "next": events[-1]["id"] if events else after})
+
+def _moves(actions) -> list:
+    return [{"action": kind, "idx": idx} for kind, idx in actions]
+
+class RunMovesView(views.APIView):
+    """GET /api/run/<uuid>/moves[?hint=N] — jogadas legais agora
+
+    Mesmo formato do batch ({action, idx}). Com `hint`, sugere a melhor
+    jogada por uma busca de até N jogadas sobre a mesa visível (ver
+    game.hints; N vai de 1 a MAX_DEPTH).
+    """
+    def get(self, request, pk):
+        try:
+            depth = int(request.GET["hint"]) if request.GET.get("hint") else None
+        except ValueError:
+            return Response({"detail":"hint inválido"}, status=400)
+        try:
+            run, state, version = current_state(pk)
+        except Run.DoesNotExist:
+            raise Http404
+        except CorruptRunLog:
+            return Response({"detail":CORRUPT_LOG_DETAIL}, status=500)
+        body = {"version": version, "status": state.status, "moves": _moves(legal_actions(state))}
+        if depth is not None:
+            hint = best_move(state, depth)
+            body["hint"] = hint and {
+                "action": hint.action[0], "idx": hint.action[1], "line": _moves(hint.line),
+                "gain": hint.gain, "depth": max(1, min(depth, MAX_DEPTH)),
+            }
+        return Response(body)
 
 class SubmitScoreView(views.APIView):
     """POST /api/run/<uuid>/score  body: {player_name?:str}"""
+    @transaction.atomic
     def post(self, request, pk):
         run = Run.objects.filter(pk=pk).first()
         if not run:
@@ -246,34 +210,50 @@ class SubmitScoreView(views.APIView):
         allow_ongoing = False  # mude para True se quiser permitir envio antes do fim
         if not allow_ongoing and run.status == "ongoing":
             return Response({"detail":"termine a run antes de enviar ao ranking"}, status=400)
+        if run.status == "abandoned":
+            return Response({"detail":"run abandonada não entra no ranking"}, status=400)
+        if getattr(settings, "SCORE_VERIFY", True):
+            mismatch = verify_run(run)  # replay do log desde a seed: 1 query + motor
+            if mismatch:
+                return Response({"detail":f"score não confere com o replay da run ({mismatch})"}, status=400)
 
         player_name = (request.data.get("player_name") or "Jogador").strip()[:30]
         obj, created = Score.objects.get_or_create(
             run=run, player_name=player_name,
-            defaults={"points": run.score_total}
+            defaults={"points": run.score_total, "seed": run.seed}
         )
         if not created:
             obj.points = max(obj.points, run.score_total)  # mantém o melhor daquela run+player
             obj.save(update_fields=["points"])
+        update_player_best(player_name, obj.points, obj.created_at)
+        transaction.on_commit(bump_ranking_version)
 
-        EventLog.objects.create(run=run, text=f"Score enviado ao ranking: {player_name} — {obj.points}.")
+        with EventBuffer() as buf:
+            buf.add(run, f"Score enviado ao ranking: {player_name} — {obj.points}.")
         return Response({"ok": True, "player_name": player_name, "points": obj.points})
 
-# views.py
-from django.db.models import Max
-from rest_framework import views
-from rest_framework.response import Response
-from .models import Score
-
+@method_decorator(condition(etag_func=ranking_etag, last_modified_func=ranking_last_modified), name="dispatch")
 class RankingApiView(views.APIView):
+    """GET /api/ranking?mode=runs|best&seed=S&limit=N&cursor=...
+
+    `seed` restringe às runs daquela seed (ranking do desafio diário).
+    Cacheado; responde 304 se nada mudou. Paginação por cursor: a próxima
+    página vem nos headers `X-Next-Cursor` e `Link: <...>; rel="next"`.
+    """
     def get(self, request):
-        mode = request.GET.get("mode","runs")
-        if mode == "best":
-            qs = (Score.objects.values("player_name")
-                  .annotate(points=Max("points"), last_at=Max("created_at"))
-                  .order_by("-points","-last_at"))[:500]
-            return Response(list(qs))
-        qs = (Score.objects
-              .order_by("-points","-created_at")
-              .values("player_name","points","created_at","run_id")[:500])
-        return Response(list(qs))
+        try:
+            limit = min(RANKING_MAX_LIMIT, max(1, int(request.GET.get("limit", RANKING_MAX_LIMIT))))
+            rows, next_cursor = cached_ranking("api", request, lambda: self.build(request, limit))
+        except ValueError:
+            return Response({"detail":"limit/cursor inválido"}, status=400)
+        response = Response(rows)
+        if next_cursor:
+            query = request.GET.copy()
+            query["cursor"] = next_cursor
+            response["X-Next-Cursor"] = next_cursor
+            response["Link"] = f'<{request.path}?{query.urlencode()}>; rel="next"'
+        return response
+
+    def build(self, request, limit):
+        qs, order = api_rows(request.GET.get("mode","runs"), request.GET.get("seed"))
+        return keyset_page(qs, order, request.GET.get("cursor"), limit)
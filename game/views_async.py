@@ -0,0 +1,143 @@
+# game/views_async.py
+"""Versões async das views de jogada e ranking (settings.ASYNC_API, só sob ASGI).
+
+Mesmos caminhos, corpos e respostas da API síncrona (views.py), sem DRF:
+o APIView do DRF não roda como corrotina. Leituras usam o ORM assíncrono
+(aget / async for); o replay e as regras do motor rodam numa thread.
+Jogadas precisam de transação (lock ou CAS + log), que o ORM assíncrono
+não tem, então play_actions roda inteiro via sync_to_async — sob ASGI cada
+requisição ganha sua própria thread, e o event loop fica livre enquanto o
+banco responde.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import hotruns
+from .challenge import daily_seed
+from .engine import IllegalAction
+from .models import Run
+from .play import MAX_BATCH_ACTIONS, current_state, play_actions, start_run, state_payload
+from .ranking import acached_ranking, akeyset_page, api_rows, aranking_version, version_etag, version_last_modified
+from .services import CorruptRunLog, VersionConflict, aload_state
+from .views import CORRUPT_LOG_DETAIL, RANKING_MAX_LIMIT
+
+# ---------------- helpers ----------------
+
+def _json(data, status=200) -> JsonResponse:
+    # mesmo encoder e formato compacto do JSONRenderer do DRF: corpo igual ao da API síncrona
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder,
+                        json_dumps_params={"separators": (",", ":"), "ensure_ascii": False})
+
+def _body(request) -> dict:
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def _since(request):
+    try:
+        return int(request.GET["since"])
+    except (KeyError, ValueError):
+        return None
+
+async def _payload(run, state, version, since, before=None) -> dict:
+    # delta sem `before` precisa reconstruir o estado antigo pelo log (banco + motor)
+    if since is None or since > version or before is not None:
+        return state_payload(run, state, version, since, before)
+    return await sync_to_async(state_payload)(run, state, version, since)
+
+async def _play(request, pk, actions, batch=False):
+    since = _since(request)
+    try:
+        played = await sync_to_async(play_actions)(pk, actions, batch, since)
+    except Run.DoesNotExist:
+        return _json({"detail":"run não encontrada"}, status=404)
+    except IllegalAction as e:
+        body = {"detail": e.detail}
+        if batch: body["index"] = e.index
+        return _json(body, status=400)
+    except VersionConflict:
+        return _json({"detail":"a run mudou em outra requisição; recarregue"}, status=409)
+    except CorruptRunLog:
+        return _json({"detail":CORRUPT_LOG_DETAIL}, status=500)
+    return _json(await _payload(played.run, played.state, played.version, since, played.before))
+
+# ---------------- API ----------------
+
+@csrf_exempt
+@require_POST
+async def start_run_view(request):
+    """POST /api/start  body: {seed:str?, max_hp:int?, daily:bool?}"""
+    data = _body(request)
+    seed = daily_seed() if data.get("daily") else (data.get("seed") or "default-seed")
+    max_hp = int(data.get("max_hp", 20))
+    run, state = await sync_to_async(start_run)(seed, max_hp)
+    return _json(await _payload(run, state, 0, _since(request)), status=201)
+
+@require_GET
+async def run_detail_view(request, pk):
+    """GET /api/run/<uuid>[?since=N]"""
+    try:
+        if hotruns.enabled():  # o cache quente usa locks de thread: fora do loop
+            run, state, version = await sync_to_async(current_state)(pk)
+        else:
+            run = await Run.objects.aget(pk=pk)
+            state, version = await aload_state(run)
+    except Run.DoesNotExist:
+        return _json({"detail":"run não encontrada"}, status=404)
+    except CorruptRunLog:
+        return _json({"detail":CORRUPT_LOG_DETAIL}, status=500)
+    return _json(await _payload(run, state, version, _since(request)))
+
+@csrf_exempt
+@require_POST
+async def run_action_view(request, pk, kind, idx=None):
+    """POST /api/run/<uuid>/<kind>[/<idx>] — kind vem do urls.py"""
+    return await _play(request, pk, [(kind, idx)])
+
+@csrf_exempt
+@require_POST
+async def batch_actions_view(request, pk):
+    """POST /api/run/<uuid>/actions  body: {actions:[{action:str, idx:int?}, ...]}"""
+    actions = _body(request).get("actions")
+    if not isinstance(actions, list) or not actions:
+        return _json({"detail":"envie uma lista 'actions' não vazia"}, status=400)
+    if len(actions) > MAX_BATCH_ACTIONS:
+        return _json({"detail":f"no máximo {MAX_BATCH_ACTIONS} ações por requisição"}, status=400)
+    return await _play(request, pk, actions, batch=True)
+
+@require_GET
+async def ranking_api_view(request):
+    """GET /api/ranking?mode=runs|best&seed=S&limit=N&cursor=... (ver views.RankingApiView)"""
+    version = await aranking_version()
+    etag, last_modified = quote_etag(version_etag(version, request)), int(version_last_modified(version).timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    async def build():
+        qs, order = api_rows(request.GET.get("mode","runs"), request.GET.get("seed"))
+        return await akeyset_page(qs, order, request.GET.get("cursor"), limit)
+
+    try:
+        limit = min(RANKING_MAX_LIMIT, max(1, int(request.GET.get("limit", RANKING_MAX_LIMIT))))
+        rows, next_cursor = await acached_ranking("api", request, build)
+    except ValueError:
+        return _json({"detail":"limit/cursor inválido"}, status=400)
+    response = _json(rows)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    if next_cursor:
+        query = request.GET.copy()
+        query["cursor"] = next_cursor
+        response["X-Next-Cursor"] = next_cursor
+        response["Link"] = f'<{request.path}?{query.urlencode()}>; rel="next"'
+    return response
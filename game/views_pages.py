@@ -1,7 +1,13 @@
 # game/views_pages.py
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import TemplateView, ListView
-from django.db.models import Max
-from .models import Score
+from .challenge import daily_seed
+from .models import Score, PlayerBest
+from .ranking import (cached_ranking, ranking_etag, ranking_last_modified,
+                      keyset_page, RUNS_ORDER, BEST_ORDER)
 
 class HomeView(TemplateView):
     """Página inicial com resumo das regras e CTA para jogar."""
@@ -15,22 +21,44 @@ class ContactView(TemplateView):
     """Página de informações e contato."""
     template_name = "contact.html"
 
+def _page_etag(request, *args, **kwargs) -> str:
+    # mode=daily muda de seed à meia-noite sem novo envio: o dia entra no ETag e no cache
+    return f"{ranking_etag(request)}-{timezone.localdate()}"
+
+@method_decorator(condition(etag_func=_page_etag, last_modified_func=ranking_last_modified), name="dispatch")
 class RankingView(ListView):
     template_name = "ranking.html"
     context_object_name = "scores"
-    paginate_by = 50
+    page_size = 50  # paginação por cursor (?cursor=...), sem OFFSET/COUNT
+
+    def get(self, request, *args, **kwargs):
+        # HTML da página vai para o cache do ranking (invalidado a cada envio)
+        def render():
+            response = super(RankingView, self).get(request, *args, **kwargs)
+            return response.render().content
+        try:
+            return HttpResponse(cached_ranking(f"page:{timezone.localdate()}", request, render))
+        except ValueError:
+            return HttpResponseBadRequest("cursor inválido")
 
     def get_queryset(self):
         mode = self.request.GET.get("mode", "runs")
+        cursor = self.request.GET.get("cursor")
         if mode == "best":
             # melhor score por jogador
-            return (Score.objects.values("player_name")
-                    .annotate(points=Max("points"), last_at=Max("created_at"))
-                    .order_by("-points", "-last_at"))
-        # top runs (cada envio aparece)
-        return Score.objects.select_related("run").all()
+            rows, self.next_cursor = keyset_page(PlayerBest.objects.all(), BEST_ORDER, cursor, self.page_size)
+        elif mode == "daily":
+            # runs do desafio de hoje
+            rows, self.next_cursor = keyset_page(Score.objects.filter(seed=daily_seed()), RUNS_ORDER,
+                                                 cursor, self.page_size)
+        else:
+            # top runs (cada envio aparece)
+            rows, self.next_cursor = keyset_page(Score.objects.all(), RUNS_ORDER, cursor, self.page_size)
+        return rows
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["mode"] = self.request.GET.get("mode", "runs")
+        ctx["next_cursor"] = self.next_cursor
+        ctx["first_page"] = not self.request.GET.get("cursor")
         return ctx
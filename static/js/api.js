@@ -32,14 +32,26 @@ async function request(path, method = "GET", body = null) {
   return await res.json();
 }
 
+// modo delta: com ?since=<versão que o cliente tem> o servidor devolve só o que mudou
+const since = (v) => (v == null ? "" : `?since=${v}`);
+
 export const API = {
   start: (seed, max_hp) => request("/api/start", "POST", { seed, max_hp }),
-  getRun: (id) => request(`/api/run/${id}`),
-  equip: (id, idx) => request(`/api/run/${id}/equip/${idx}`, "POST"),
-  discard: (id, idx) => request(`/api/run/${id}/discard/${idx}`, "POST"),
-  useHeal: (id, idx) => request(`/api/run/${id}/use_heal/${idx}`, "POST"),
-  fight: (id, idx) => request(`/api/run/${id}/fight/${idx}`, "POST"),
-  payLife: (id, idx) => request(`/api/run/${id}/pay_life/${idx}`, "POST"),
-  endTurn: (id) => request(`/api/run/${id}/end_turn`, "POST"),
+  // desafio do dia: seed igual para todos, ranking em /api/ranking?seed=<seed>
+  daily: () => request("/api/daily"),
+  startDaily: (max_hp) => request("/api/start", "POST", { daily: true, max_hp }),
+  getRun: (id, v) => request(`/api/run/${id}${since(v)}`),
+  equip: (id, idx, v) => request(`/api/run/${id}/equip/${idx}${since(v)}`, "POST"),
+  discard: (id, idx, v) => request(`/api/run/${id}/discard/${idx}${since(v)}`, "POST"),
+  useHeal: (id, idx, v) => request(`/api/run/${id}/use_heal/${idx}${since(v)}`, "POST"),
+  fight: (id, idx, v) => request(`/api/run/${id}/fight/${idx}${since(v)}`, "POST"),
+  payLife: (id, idx, v) => request(`/api/run/${id}/pay_life/${idx}${since(v)}`, "POST"),
+  endTurn: (id, v) => request(`/api/run/${id}/end_turn${since(v)}`, "POST"),
+  // várias ações em uma requisição: [{action:"equip", idx:0}, {action:"end_turn"}]
+  actions: (id, actions, v) => request(`/api/run/${id}/actions${since(v)}`, "POST", { actions }),
+  // log da run a partir de um cursor (id do último evento visto): {events, next}
+  events: (id, after = 0) => request(`/api/run/${id}/events?after=${after}`),
+  // jogadas legais agora; com hint=N, também a melhor jogada por uma busca de N passos
+  moves: (id, hint) => request(`/api/run/${id}/moves${hint ? `?hint=${hint}` : ""}`),
   submitScore: (id, player_name) => request(`/api/run/${id}/score`, "POST", { player_name }),
 };